@@ -1,57 +1,255 @@
+import asyncio
 import logging
-from pymongo import MongoClient
-from config import MONGO_URI, DB_NAME
+import time
+from datetime import datetime
+from pymongo import AsyncMongoClient, ASCENDING, DESCENDING, TEXT
+from config import MONGO_URI, DB_NAME, ROLE_CACHE_TTL, ROLE_CACHE_CHECK, FSM_TTL, UPDATE_RETENTION, BACKUP_TOMBSTONE_DAYS
+from app.utils.metrics import MongoCommandListener, add_collector
 
 logger = logging.getLogger(__name__)
 
-try:
-    client = MongoClient(MONGO_URI)
-    db = client[DB_NAME]
-
-    users_collection = db["users"]
-    tickets_collection = db["tickets"]
-    admins_collection = db["admins"]
-    broadcasts_collection = db["broadcasts"]
-    
-    client.admin.command('ping')
-    logger.info("Connected to MongoDB Atlas")
-except Exception as e:
-    logger.critical(f"Failed to connect to MongoDB: {e}")
-
-def get_support_ids():
-    admins = admins_collection.find({})
-    return [admin["telegram_id"] for admin in admins]
-
-def is_support(user_id):
-    return admins_collection.find_one({"telegram_id": user_id}) is not None
-
-def is_super_admin(user_id):
-    user = admins_collection.find_one({"telegram_id": user_id})
-    if user and user.get("is_super_admin") is True:
-        return True
-    return False
+client = AsyncMongoClient(MONGO_URI, event_listeners=[MongoCommandListener()])
+db = client[DB_NAME]
+
+users_collection = db["users"]
+tickets_collection = db["tickets"]
+admins_collection = db["admins"]
+broadcasts_collection = db["broadcasts"]
+fsm_collection = db["fsm_states"]
+jobs_collection = db["jobs"]
+throttle_collection = db["throttle"]
+stats_collection = db["ticket_stats"]
+updates_collection = db["updates"]
+meta_collection = db["meta"]
+deletions_collection = db["deletions"]
+
+async def init_db():
+    try:
+        await client.admin.command('ping')
+        logger.info("Connected to MongoDB Atlas")
+        await ensure_indexes()
+    except Exception as e:
+        logger.critical(f"Failed to connect to MongoDB: {e}")
+
+INDEXES = {
+    "tickets": [
+        ([("ticket_id", ASCENDING)], {"unique": True}),
+        ([("telegram_id", ASCENDING), ("created_at", DESCENDING), ("ticket_id", DESCENDING)], {}),
+        ([("status", ASCENDING), ("created_at", ASCENDING), ("ticket_id", ASCENDING)], {}),
+        ([("status", ASCENDING), ("priority", ASCENDING), ("created_at", ASCENDING)], {}),
+        ([("updated_at", ASCENDING)], {}),
+        ([("ticket_id", TEXT), ("name", TEXT), ("phone", TEXT), ("description", TEXT)], {
+            "name": "tickets_search",
+            "weights": {"ticket_id": 10, "phone": 8, "name": 5, "description": 1},
+            "default_language": "none"
+        }),
+    ],
+    "users": [
+        ([("telegram_id", ASCENDING)], {"unique": True}),
+    ],
+    "admins": [
+        ([("telegram_id", ASCENDING)], {"unique": True}),
+    ],
+    "throttle": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "fsm_states": [
+        ([("updated_at", ASCENDING)], {"expireAfterSeconds": FSM_TTL}),
+    ],
+    "updates": [
+        ([("shard", ASCENDING), ("status", ASCENDING), ("_id", ASCENDING)], {}),
+        ([("processed_at", ASCENDING)], {"expireAfterSeconds": UPDATE_RETENTION}),
+    ],
+    "deletions": [
+        ([("deleted_at", ASCENDING)], {"expireAfterSeconds": BACKUP_TOMBSTONE_DAYS * 24 * 60 * 60}),
+    ],
+}
+
+async def ensure_indexes():
+    for coll_name, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                await db[coll_name].create_index(keys, **options)
+            except Exception as e:
+                logger.error(f"Failed to create index {keys} on {coll_name}: {e}")
+    logger.info("MongoDB indexes ensured")
+
+def hot_queries():
+    return {
+        "ticket by id": tickets_collection.find({"ticket_id": "00000000"}).limit(1),
+        "user active tickets": tickets_collection.find({"telegram_id": 0, "status": {"$in": ["Очікує", "Прийнята"]}}),
+        "user history": tickets_collection.find({"telegram_id": 0}).sort([("created_at", -1), ("ticket_id", -1)]).limit(11),
+        "active tickets": tickets_collection.find({"status": {"$in": ["Очікує", "Прийнята"]}}).sort([("created_at", 1), ("ticket_id", 1)]).limit(11),
+        "closed tickets": tickets_collection.find({"status": {"$in": ["Завершена", "Відхилена", "Скасована"]}}).sort("created_at", -1).limit(20),
+        "sla overdue": tickets_collection.find({"status": "Очікує", "priority": "Високий", "created_at": {"$lte": datetime.utcnow()}}),
+        "recently updated": tickets_collection.find({"updated_at": {"$gt": datetime.utcnow()}, "notifications.0": {"$exists": True}}).sort("updated_at", 1),
+        "ticket search": tickets_collection.find({"$text": {"$search": "test"}}).limit(10),
+        "user by id": users_collection.find({"telegram_id": 0}).limit(1),
+        "admin by id": admins_collection.find({"telegram_id": 0}).limit(1),
+    }
+
+def _plan_stages(plan):
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return [stage for stage in stages if stage]
+
+async def explain_hot_queries():
+    report = {}
+    for name, cursor in hot_queries().items():
+        try:
+            plan = await cursor.explain()
+            report[name] = _plan_stages(plan["queryPlanner"]["winningPlan"])
+        except Exception as e:
+            report[name] = [f"ERROR: {e}"]
+    return report
+
+async def close_db():
+    await client.close()
+
+ROLES_VERSION_ID = "roles"
+
+async def get_roles_version():
+    state = await meta_collection.find_one({"_id": ROLES_VERSION_ID}, {"version": 1})
+    return state.get("version", 0) if state else 0
+
+async def bump_roles_version():
+    await meta_collection.update_one({"_id": ROLES_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True)
+
+class RoleCache:
+    def __init__(self, ttl, check_interval):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.support_ids = frozenset()
+        self.super_admin_ids = frozenset()
+        self.loaded_at = None
+        self.checked_at = None
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self):
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    def _is_checked(self):
+        return self.checked_at is not None and time.monotonic() - self.checked_at < self.check_interval
 
-def add_support(user_id, username=None):
-    if not is_support(user_id):
-        admins_collection.insert_one({
-            "telegram_id": user_id, 
+    def invalidate(self):
+        self.loaded_at = None
+
+    async def _version_changed(self):
+        try:
+            version = await get_roles_version()
+        except Exception as e:
+            logger.warning(f"Role cache version check failed, serving cached roles: {e}")
+            version = self.version
+        self.checked_at = time.monotonic()
+        return version != self.version
+
+    async def refresh(self):
+        self.version = await get_roles_version()
+        self.checked_at = time.monotonic()
+        support_ids, super_admin_ids = set(), set()
+        async for admin in admins_collection.find({}, {"_id": 0, "telegram_id": 1, "is_super_admin": 1}):
+            support_ids.add(admin["telegram_id"])
+            if admin.get("is_super_admin") is True:
+                super_admin_ids.add(admin["telegram_id"])
+        self.support_ids = frozenset(support_ids)
+        self.super_admin_ids = frozenset(super_admin_ids)
+        self.loaded_at = time.monotonic()
+
+    async def ensure_loaded(self):
+        if self._is_fresh() and self._is_checked():
+            self.hits += 1
+            return
+        async with self._lock:
+            if self._is_fresh() and (self._is_checked() or not await self._version_changed()):
+                self.hits += 1
+                return
+            self.misses += 1
+            await self.refresh()
+
+    async def get_role(self, user_id):
+        await self.ensure_loaded()
+        if user_id in self.super_admin_ids:
+            return "super_admin"
+        if user_id in self.support_ids:
+            return "support"
+        return "user"
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.support_ids)}
+
+role_cache = RoleCache(ROLE_CACHE_TTL, ROLE_CACHE_CHECK)
+
+add_collector(lambda: [
+    "# TYPE role_cache_hits_total counter",
+    f"role_cache_hits_total {role_cache.hits}",
+    "# TYPE role_cache_misses_total counter",
+    f"role_cache_misses_total {role_cache.misses}",
+])
+
+async def get_support_ids():
+    await role_cache.ensure_loaded()
+    return list(role_cache.support_ids)
+
+async def is_support(user_id):
+    return await role_cache.get_role(user_id) != "user"
+
+async def is_super_admin(user_id):
+    return await role_cache.get_role(user_id) == "super_admin"
+
+async def get_super_admin_id():
+    try:
+        await role_cache.ensure_loaded()
+    except Exception as e:
+        logger.warning(f"Failed to load roles, using the cached super admin: {e}")
+    return next(iter(role_cache.super_admin_ids), None)
+
+async def add_support(user_id, username=None):
+    if not await is_support(user_id):
+        await admins_collection.insert_one({
+            "telegram_id": user_id,
             "username": username,
-            "is_super_admin": False 
+            "is_super_admin": False
         })
+        await bump_roles_version()
+        role_cache.invalidate()
         logger.info(f"New admin added: {user_id} ({username})")
         return True
     return False
 
-def remove_support(user_id):
-    result = admins_collection.delete_one({"telegram_id": user_id})
-    if result.deleted_count > 0:
+async def record_deletion(coll_name, doc_id):
+    await deletions_collection.insert_one({"collection": coll_name, "doc_id": doc_id, "deleted_at": datetime.utcnow()})
+
+async def remove_support(user_id):
+    admin = await admins_collection.find_one_and_delete({"telegram_id": user_id}, projection={"_id": 1})
+    if admin:
+        await record_deletion("admins", admin["_id"])
+        await bump_roles_version()
+        role_cache.invalidate()
         logger.info(f"Admin removed: {user_id}")
         return True
     return False
 
-def get_all_admins_details():
-    return list(admins_collection.find({}, {"_id": 0, "telegram_id": 1, "username": 1, "is_super_admin": 1}))
+async def get_all_admins_details():
+    return await admins_collection.find({}, {"_id": 0, "telegram_id": 1, "username": 1, "is_super_admin": 1}).to_list(length=None)
+
+async def get_all_users():
+    return [user["telegram_id"] async for user in users_collection.find({}, {"_id": 0, "telegram_id": 1})]
 
-def get_all_users():
-    users = users_collection.find({})
-    return [user["telegram_id"] for user in users]
\ No newline at end of file
+async def register_user(telegram_id, username=None):
+    result = await users_collection.update_one(
+        {"telegram_id": telegram_id},
+        {"$setOnInsert": {
+            "telegram_id": telegram_id,
+            "username": username,
+            "registered_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+    return result.upserted_id is not None
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+
+EPOCH = datetime(1970, 1, 1)
+
+def encode_cursor(doc):
+    millis = int((doc["created_at"] - EPOCH) / timedelta(milliseconds=1))
+    return f"{millis}:{doc['ticket_id']}"
+
+def decode_cursor(cursor):
+    millis, ticket_id = cursor.split(":", 1)
+    return EPOCH + timedelta(milliseconds=int(millis)), ticket_id
+
+async def fetch_page(collection, query, cursor=None, direction="next", order=ASCENDING, page_size=10, projection=None):
+    forward = direction != "prev"
+    sort_dir = order if forward else -order
+
+    if cursor:
+        created_at, ticket_id = decode_cursor(cursor)
+        op = "$gt" if sort_dir == ASCENDING else "$lt"
+        query = {"$and": [query, {"$or": [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, "ticket_id": {op: ticket_id}}
+        ]}]}
+
+    docs = await collection.find(query, projection) \
+        .sort([("created_at", sort_dir), ("ticket_id", sort_dir)]) \
+        .limit(page_size + 1) \
+        .to_list(length=None)
+
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    if not forward:
+        docs.reverse()
+
+    has_prev = has_more if not forward else cursor is not None
+    has_next = has_more if forward else cursor is not None
+    return docs, has_prev, has_next
\ No newline at end of file
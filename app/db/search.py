@@ -0,0 +1,33 @@
+import re
+from app.db.database import tickets_collection
+
+TICKET_ID_RE = re.compile(r"^#?([0-9a-f]{8})$", re.IGNORECASE)
+
+SEARCH_PROJECTION = {
+    "_id": 0, "ticket_id": 1, "status": 1, "priority": 1, "name": 1,
+    "phone": 1, "description": 1, "created_at": 1, "score": {"$meta": "textScore"}
+}
+
+PHONE_RE = re.compile(r"^[\d\s+()-]+$")
+
+def _normalize(query):
+    query = query.strip()
+    digits = re.sub(r"\D", "", query)
+    if PHONE_RE.match(query) and len(digits) >= 9:
+        return " ".join({digits, digits[-9:], digits[-10:], "380" + digits[-9:]})
+    return query
+
+async def search_tickets(query, offset=0, limit=10):
+    match = TICKET_ID_RE.match(query.strip())
+    if match:
+        ticket = await tickets_collection.find_one({"ticket_id": match.group(1).lower()}, {"_id": 0})
+        if ticket:
+            return [ticket] if offset == 0 else []
+
+    return await tickets_collection.find(
+        {"$text": {"$search": _normalize(query)}},
+        SEARCH_PROJECTION
+    ).sort([("score", {"$meta": "textScore"}), ("created_at", -1)]) \
+        .skip(offset) \
+        .limit(limit) \
+        .to_list(length=None)
\ No newline at end of file
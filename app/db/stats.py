@@ -0,0 +1,167 @@
+import logging
+from datetime import datetime, timedelta
+
+from config import STATS_DAYS
+from app.db.database import client, tickets_collection, stats_collection
+from app.db.ticket_states import PENDING, ACCEPTED, COMPLETED, REJECTED
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_ID = "tickets"
+DELTAS_ID = "tickets_deltas"
+MEDIAN_MIN_VERSION = (7, 0)
+
+ACCEPT_TIMING = ({"accepted_at": {"$ne": None}}, "first_response_sec")
+COMPLETE_TIMING = ({"status": COMPLETED}, "resolution_sec")
+
+_median_supported = None
+
+def _count_by(field):
+    return [
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$project": {"_id": 0, "k": {"$ifNull": ["$_id", "—"]}, "v": "$count"}}
+    ]
+
+def _count_status(status):
+    return {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+
+def _median_facets(median):
+    if median:
+        return {"timings": [
+            {"$group": {
+                "_id": None,
+                "accept_sec": {"$median": {"input": {"$cond": [{"$ifNull": ["$accepted_at", False]}, "$first_response_sec", None]}, "method": "approximate"}},
+                "complete_sec": {"$median": {"input": {"$cond": [{"$eq": ["$status", COMPLETED]}, "$resolution_sec", None]}, "method": "approximate"}}
+            }}
+        ]}
+    facets = {}
+    for name, (condition, field) in (("accept_sec", ACCEPT_TIMING), ("complete_sec", COMPLETE_TIMING)):
+        facets[name] = [
+            {"$match": {**condition, field: {"$ne": None}}},
+            {"$sort": {field: 1}},
+            {"$group": {"_id": None, "values": {"$push": f"${field}"}}}
+        ]
+    return facets
+
+def _median_value(name, median):
+    if median:
+        return {"$arrayElemAt": [f"$timings.{name}", 0]}
+    values = {"$ifNull": [{"$arrayElemAt": [f"${name}.values", 0]}, []]}
+    return {"$arrayElemAt": [values, {"$floor": {"$divide": [{"$size": values}, 2]}}]}
+
+def summary_pipeline(now, median=True):
+    return [
+        {"$facet": {
+            "by_status": _count_by("status"),
+            "by_priority": _count_by("priority"),
+            **_median_facets(median),
+            "operators": [
+                {"$match": {"accepted_by_id": {"$ne": None}}},
+                {"$group": {
+                    "_id": "$accepted_by_id",
+                    "name": {"$last": "$accepted_by"},
+                    "active": _count_status(ACCEPTED),
+                    "completed": _count_status(COMPLETED),
+                    "rejected": _count_status(REJECTED)
+                }},
+                {"$project": {"_id": 0, "k": {"$toString": "$_id"}, "v": {"name": "$name", "active": "$active", "completed": "$completed", "rejected": "$rejected"}}}
+            ],
+            "daily": [
+                {"$match": {"created_at": {"$gte": now - timedelta(days=STATS_DAYS)}}},
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": {"$sum": 1}}},
+                {"$project": {"_id": 0, "k": "$_id", "v": "$count"}}
+            ]
+        }},
+        {"$project": {
+            "_id": {"$literal": SUMMARY_ID},
+            "by_status": {"$arrayToObject": "$by_status"},
+            "by_priority": {"$arrayToObject": "$by_priority"},
+            "median_accept_sec": _median_value("accept_sec", median),
+            "median_complete_sec": _median_value("complete_sec", median),
+            "operators": {"$arrayToObject": "$operators"},
+            "daily": {"$arrayToObject": "$daily"},
+            "built_at": {"$literal": now}
+        }},
+        {"$merge": {"into": stats_collection.name, "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+async def median_supported():
+    global _median_supported
+    if _median_supported is None:
+        version = (await client.server_info())["versionArray"]
+        _median_supported = tuple(version[:2]) >= MEDIAN_MIN_VERSION
+        if not _median_supported:
+            logger.info(f"MongoDB {'.'.join(map(str, version[:3]))} has no $median, computing medians by sorting")
+    return _median_supported
+
+def _flatten(doc, prefix=""):
+    for key, value in doc.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+async def rebuild_stats():
+    now = datetime.utcnow()
+    median = await median_supported()
+    await stats_collection.replace_one({"_id": DELTAS_ID}, {}, upsert=True)
+    try:
+        await tickets_collection.aggregate(summary_pipeline(now, median))
+    finally:
+        deltas = await stats_collection.find_one_and_delete({"_id": DELTAS_ID}) or {}
+
+    inc, set_fields = {}, {}
+    for path, value in _flatten(deltas):
+        if path == "_id":
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            inc[path] = value
+        else:
+            set_fields[path] = value
+    if inc or set_fields:
+        await _apply(inc, set_fields)
+    logger.info(f"Ticket statistics rebuilt, {len(inc)} concurrent changes re-applied")
+
+async def get_stats():
+    summary = await stats_collection.find_one({"_id": SUMMARY_ID})
+    if summary is None:
+        await rebuild_stats()
+        summary = await stats_collection.find_one({"_id": SUMMARY_ID})
+    return summary
+
+async def _apply(inc, set_fields=None):
+    update = {}
+    if inc:
+        update["$inc"] = inc
+    if set_fields:
+        update["$set"] = set_fields
+    try:
+        await stats_collection.update_many({"_id": {"$in": [SUMMARY_ID, DELTAS_ID]}}, update)
+    except Exception as e:
+        logger.warning(f"Failed to update ticket statistics: {e}")
+
+async def record_created(ticket):
+    await _apply({
+        f"by_status.{PENDING}": 1,
+        f"by_priority.{ticket['priority']}": 1,
+        f"daily.{ticket['created_at']:%Y-%m-%d}": 1
+    })
+
+async def record_transition(ticket):
+    previous, status = ticket.get("previous_status"), ticket["status"]
+    inc = {f"by_status.{previous}": -1, f"by_status.{status}": 1}
+    set_fields = {}
+
+    operator_id = ticket.get("accepted_by_id")
+    if operator_id is not None:
+        key = f"operators.{operator_id}"
+        if previous == ACCEPTED:
+            inc[f"{key}.active"] = -1
+        if status == ACCEPTED:
+            inc[f"{key}.active"] = 1
+            set_fields[f"{key}.name"] = ticket.get("accepted_by")
+        elif status == COMPLETED:
+            inc[f"{key}.completed"] = 1
+        elif status == REJECTED:
+            inc[f"{key}.rejected"] = 1
+    await _apply(inc, set_fields)
\ No newline at end of file
@@ -0,0 +1,59 @@
+from datetime import datetime
+from pymongo import ReturnDocument
+from app.db.database import tickets_collection
+
+PENDING = "Очікує"
+ACCEPTED = "Прийнята"
+COMPLETED = "Завершена"
+REJECTED = "Відхилена"
+CANCELLED = "Скасована"
+
+ACTIVE_STATUSES = [PENDING, ACCEPTED]
+CLOSED_STATUSES = [COMPLETED, REJECTED, CANCELLED]
+
+TRANSITIONS = {
+    PENDING: {ACCEPTED, REJECTED, CANCELLED},
+    ACCEPTED: {COMPLETED, REJECTED, CANCELLED},
+    COMPLETED: set(),
+    REJECTED: set(),
+    CANCELLED: set(),
+}
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, set())
+
+def allowed_sources(to_status):
+    return [status for status, targets in TRANSITIONS.items() if to_status in targets]
+
+def _elapsed_seconds(now):
+    return {"$divide": [{"$subtract": [now, "$created_at"]}, 1000]}
+
+def build_transition(ticket_id, to_status, fields=None, owner_id=None, now=None):
+    sources = allowed_sources(to_status)
+    if not sources:
+        raise ValueError(f"No transition leads to status {to_status!r}")
+
+    query = {"ticket_id": ticket_id, "status": {"$in": sources}}
+    if owner_id is not None:
+        query["telegram_id"] = owner_id
+
+    now = now or datetime.utcnow()
+    values = {key: {"$literal": value} for key, value in (fields or {}).items()}
+    values.update({"previous_status": "$status", "status": {"$literal": to_status}, "updated_at": now})
+    if to_status == ACCEPTED:
+        values["accepted_at"] = now
+        values["first_response_sec"] = _elapsed_seconds(now)
+    if to_status in CLOSED_STATUSES:
+        values["resolved_at"] = now
+        values["resolution_sec"] = _elapsed_seconds(now)
+    if to_status == REJECTED:
+        values["first_response_sec"] = {"$ifNull": ["$first_response_sec", _elapsed_seconds(now)]}
+    return query, [{"$set": values}]
+
+async def transition(ticket_id, to_status, fields=None, owner_id=None, collection=tickets_collection):
+    query, update = build_transition(ticket_id, to_status, fields, owner_id)
+    ticket = await collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+    if ticket:
+        from app.db.stats import record_transition
+        await record_transition(ticket)
+    return ticket
\ No newline at end of file
@@ -1,11 +1,16 @@
 from aiogram.filters import BaseFilter
-from aiogram.types import Message, CallbackQuery
-from app.db.database import is_support
+from aiogram.types import Message, CallbackQuery, InlineQuery
+from app.db.database import role_cache
+
+async def _resolve_role(event: Message | CallbackQuery | InlineQuery, role: str | None) -> str:
+    if role is None:
+        role = await role_cache.get_role(event.from_user.id)
+    return role
 
 class IsSupport(BaseFilter):
-    async def __call__(self, event: Message | CallbackQuery) -> bool:
-        return is_support(event.from_user.id)
+    async def __call__(self, event: Message | CallbackQuery | InlineQuery, role: str | None = None) -> bool:
+        return await _resolve_role(event, role) != "user"
 
 class IsNotSupport(BaseFilter):
-    async def __call__(self, event: Message | CallbackQuery) -> bool:
-        return not is_support(event.from_user.id)
\ No newline at end of file
+    async def __call__(self, event: Message | CallbackQuery | InlineQuery, role: str | None = None) -> bool:
+        return await _resolve_role(event, role) == "user"
\ No newline at end of file
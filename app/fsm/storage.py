@@ -0,0 +1,129 @@
+import contextlib
+import logging
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import FSM_STORAGE, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+_UNSET = object()
+_batch: ContextVar[Optional[Dict[StorageKey, list]]] = ContextVar("fsm_batch", default=None)
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+class MongoStorage(BaseStorage):
+    def __init__(self, collection, key_builder: Optional[KeyBuilder] = None):
+        self.collection = collection
+        self.key_builder = key_builder or DefaultKeyBuilder()
+
+    def _id(self, key: StorageKey):
+        return self.key_builder.build(key)
+
+    async def set_record(self, key: StorageKey, state: Any = _UNSET, data: Any = _UNSET):
+        fields = {}
+        if state is not _UNSET:
+            fields["state"] = _state_name(state)
+        if data is not _UNSET:
+            fields["data"] = data
+
+        if fields.get("state", _UNSET) is None and fields.get("data", _UNSET) == {}:
+            await self.collection.delete_one({"_id": self._id(key)})
+            return
+
+        fields["updated_at"] = datetime.utcnow()
+        await self.collection.update_one({"_id": self._id(key)}, {"$set": fields}, upsert=True)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self.set_record(key, state=state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        doc = await self.collection.find_one({"_id": self._id(key)}, {"state": 1})
+        return doc.get("state") if doc else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self.set_record(key, data=dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        doc = await self.collection.find_one({"_id": self._id(key)}, {"data": 1})
+        return dict(doc.get("data") or {}) if doc else {}
+
+    async def close(self) -> None:
+        pass
+
+class CoalescingStorage(BaseStorage):
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+
+    @contextlib.asynccontextmanager
+    async def batch(self):
+        token = _batch.set({})
+        try:
+            yield
+        finally:
+            pending = _batch.get()
+            _batch.reset(token)
+            for key, (state, data) in pending.items():
+                await self._write(key, state, data)
+
+    async def _write(self, key: StorageKey, state: Any, data: Any):
+        if isinstance(self.storage, MongoStorage):
+            await self.storage.set_record(key, state, data)
+            return
+        if state is not _UNSET:
+            await self.storage.set_state(key, state)
+        if data is not _UNSET:
+            await self.storage.set_data(key, data)
+
+    def _pending(self, key: StorageKey):
+        pending = _batch.get()
+        if pending is None:
+            return None
+        return pending.setdefault(key, [_UNSET, _UNSET])
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = self._pending(key)
+        if entry is None:
+            await self.storage.set_state(key, state)
+        else:
+            entry[0] = _state_name(state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        entry = self._pending(key)
+        if entry is None or entry[0] is _UNSET:
+            return await self.storage.get_state(key)
+        return entry[0]
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        entry = self._pending(key)
+        if entry is None:
+            await self.storage.set_data(key, data)
+        else:
+            entry[1] = dict(data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        entry = self._pending(key)
+        if entry is None:
+            return await self.storage.get_data(key)
+        if entry[1] is _UNSET:
+            entry[1] = await self.storage.get_data(key)
+        return dict(entry[1])
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+def create_fsm_storage() -> BaseStorage:
+    if FSM_STORAGE == "mongo":
+        from app.db.database import fsm_collection
+        return CoalescingStorage(MongoStorage(fsm_collection))
+    if FSM_STORAGE == "redis":
+        from aiogram.fsm.storage.redis import RedisStorage
+        return CoalescingStorage(RedisStorage.from_url(REDIS_URL))
+    if FSM_STORAGE != "memory":
+        logger.warning(f"Unknown FSM_STORAGE '{FSM_STORAGE}', falling back to memory")
+    return MemoryStorage()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import html
 import logging
 import os
 from dotenv import load_dotenv
@@ -5,6 +6,10 @@ from aiogram import Router, Bot
 from aiogram.types import ErrorEvent
 from aiogram.filters import ExceptionTypeFilter
 
+from config import ERROR_WINDOW
+from app.utils.notifier import fan_out
+from app.utils.error_aggregator import error_aggregator
+
 load_dotenv()
 
 support_ids_str = os.getenv("SUPPORT_IDS", "")
@@ -13,6 +18,25 @@ ADMIN_IDS = [int(x) for x in support_ids_str.split(",") if x.strip().isdigit()]
 error_router = Router()
 logger = logging.getLogger(__name__)
 
+def format_alert(summary):
+    if summary["first"]:
+        title = "🚨 <b>Critical Error</b>"
+    else:
+        title = f"🔁 <b>Повторна помилка ×{summary['count']}</b> ({summary['window_count']} за {ERROR_WINDOW // 60} хв)"
+    return (
+        f"{title} <code>{summary['key']}</code>\n"
+        f"<b>{summary['type']}</b>: {html.escape(summary['message'][:500])}\n"
+        f"📍 <code>{html.escape(summary['location'])}</code>"
+    )
+
+async def send_alerts(bot: Bot, summaries):
+    for summary in summaries:
+        text = format_alert(summary)
+        await fan_out(ADMIN_IDS, lambda admin_id: bot.send_message(admin_id, text))
+
+async def flush_error_alerts(bot: Bot):
+    await send_alerts(bot, error_aggregator.due())
+
 @error_router.error(ExceptionTypeFilter(Exception))
 async def global_error_handler(event: ErrorEvent, bot: Bot):
     logger.critical(f"Uncaught exception: {event.exception}", exc_info=True)
@@ -23,8 +47,7 @@ async def global_error_handler(event: ErrorEvent, bot: Bot):
         except Exception as e:
             logger.error(f"Could not send error message to user: {e}")
 
-    for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(admin_id, f"🚨 <b>Critical Error:</b>\n{event.exception}")
-        except Exception as e:
-            logger.error(f"Failed to send error log to admin {admin_id}: {e}")
\ No newline at end of file
+    user = event.update.event.from_user if hasattr(event.update.event, "from_user") else None
+    summary = error_aggregator.record(event.exception, event.update.update_id, user.id if user else None)
+    if summary:
+        await send_alerts(bot, [summary])
\ No newline at end of file
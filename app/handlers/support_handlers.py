@@ -1,14 +1,17 @@
+import html
 import logging
-from datetime import datetime
 from aiogram import Router, F, types, Bot
-from aiogram.filters import Command, StateFilter
+from aiogram.filters import Command, CommandObject, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.types import ReplyKeyboardRemove
+from aiogram.exceptions import TelegramBadRequest
+
+from config import DASHBOARD_PAGE_SIZE, DASHBOARD_SNIPPET, NAME_SNIPPET, SEARCH_PAGE_SIZE, STATS_DAYS
 
 from app.db.database import (
-    tickets_collection, db, get_support_ids, broadcasts_collection, 
-    get_all_users, is_super_admin, 
-    add_support, remove_support, get_all_admins_details
+    tickets_collection, db, is_super_admin,
+    add_support, remove_support, get_all_admins_details, role_cache,
+    explain_hot_queries
 )
 
 from app.keyboards.support_keyboards import (
@@ -21,23 +24,36 @@ from app.keyboards.support_keyboards import (
     super_admin_main_menu,
     admin_management_reply_kb,
     delete_admin_list_kb,
-    cancel_kb
+    cancel_kb,
+    active_tickets_kb,
+    search_results_kb,
+    PRIORITY_FILTERS,
+    PRIORITY_ICONS
 )
 from app.fsm.support_forms import RejectForm, BroadcastForm, AdminManageForm
+from app.db.ticket_states import transition, PENDING, ACCEPTED, COMPLETED, REJECTED, ACTIVE_STATUSES
+from app.db.pagination import fetch_page, encode_cursor
+from app.db.search import search_tickets
+from app.db.stats import get_stats
+from app.utils.broadcast import start_broadcast
+from app.utils.notifier import notify_support
+from app.utils.attachments import send_ticket_card, ticket_attachments
+from app.utils.live_cards import render_card, record_notifications, edit_card
+from app.utils.error_aggregator import error_aggregator
 
 router = Router()
 logger = logging.getLogger(__name__)
 
 @router.message(Command("start"))
 async def start_cmd_support(msg: types.Message):
-    if is_super_admin(msg.from_user.id):
+    if await is_super_admin(msg.from_user.id):
         await msg.answer("👋 Вітаю, Шеф! Ви в панелі Супер-Адміністратора.", reply_markup=super_admin_main_menu())
     else:
         await msg.answer("👋 Вітаю у панелі техпідтримки!", reply_markup=support_main_menu())
 
 @router.message(F.text == "👥 Керування персоналом", StateFilter("*"))
 async def open_staff_management(msg: types.Message, state: FSMContext):
-    if not is_super_admin(msg.from_user.id):
+    if not await is_super_admin(msg.from_user.id):
         return
 
     await state.clear()
@@ -45,9 +61,9 @@ async def open_staff_management(msg: types.Message, state: FSMContext):
 
 @router.message(F.text == "📋 Список адмінів")
 async def show_admin_list(msg: types.Message):
-    if not is_super_admin(msg.from_user.id): return
+    if not await is_super_admin(msg.from_user.id): return
     
-    admins = get_all_admins_details()
+    admins = await get_all_admins_details()
     text = "📋 <b>Список адміністраторів:</b>\n\n"
     for i, admin in enumerate(admins, 1):
         role_icon = "👑" if admin.get("is_super_admin") else "👤"
@@ -58,7 +74,7 @@ async def show_admin_list(msg: types.Message):
 
 @router.message(F.text == "➕ Додати адміна")
 async def start_add_admin(msg: types.Message, state: FSMContext):
-    if not is_super_admin(msg.from_user.id): return
+    if not await is_super_admin(msg.from_user.id): return
     
     await msg.answer("✍️ Введіть <b>Telegram ID</b> нового співробітника:")
     await state.set_state(AdminManageForm.waiting_for_new_admin_id)
@@ -74,7 +90,7 @@ async def process_add_admin(msg: types.Message, state: FSMContext, bot: Bot):
         except Exception:
             username = "New Admin"
 
-        if add_support(new_id, username):
+        if await add_support(new_id, username):
             result_text = f"✅ Користувача <code>{new_id}</code> ({username}) успішно додано!"
         else:
             result_text = "⚠️ Цей користувач вже є в списку."
@@ -88,9 +104,9 @@ async def process_add_admin(msg: types.Message, state: FSMContext, bot: Bot):
 
 @router.message(F.text == "➖ Видалити адміна")
 async def start_del_admin_menu(msg: types.Message):
-    if not is_super_admin(msg.from_user.id): return
+    if not await is_super_admin(msg.from_user.id): return
     
-    admins = get_all_admins_details()
+    admins = await get_all_admins_details()
     my_id = msg.from_user.id
     filtered_admins = [a for a in admins if a['telegram_id'] != my_id and not a.get('is_super_admin')]
 
@@ -102,11 +118,11 @@ async def start_del_admin_menu(msg: types.Message):
 
 @router.callback_query(F.data.startswith("del_adm|"))
 async def finish_del_admin(query: types.CallbackQuery, state: FSMContext):
-    if not is_super_admin(query.from_user.id): return
+    if not await is_super_admin(query.from_user.id): return
 
     target_id = int(query.data.split("|")[1])
     
-    if remove_support(target_id):
+    if await remove_support(target_id):
         await query.answer("✅ Адміна звільнено!")
         await query.message.edit_text(f"✅ Адміністратора <code>{target_id}</code> видалено.")
     else:
@@ -117,7 +133,7 @@ async def finish_del_admin(query: types.CallbackQuery, state: FSMContext):
 @router.message(F.text == "🔙 Назад до головного меню")
 async def back_to_main_menu(msg: types.Message, state: FSMContext):
     await state.clear()
-    kb = super_admin_main_menu() if is_super_admin(msg.from_user.id) else support_main_menu()
+    kb = super_admin_main_menu() if await is_super_admin(msg.from_user.id) else support_main_menu()
     await msg.answer("🏠 Ви повернулись у головне меню.", reply_markup=kb)
 
 @router.callback_query(F.data == "admin_cancel")
@@ -130,28 +146,15 @@ async def admin_cancel_action(query: types.CallbackQuery, state: FSMContext):
     await query.answer()
 
 async def notify_support_new_ticket(ticket, bot: Bot):
-    text = (
-        f"🆕 <b>Нова заявка #{ticket['ticket_id']}</b>\n"
-        f"👤 {ticket['name']}\n"
-        f"📞 {ticket['phone']}\n"
-        f"📄 {ticket['description']}\n"
-        f"⚙️ Пріоритет: {ticket['priority']}"
-    )
-    kb = support_accept_kb(ticket['ticket_id'])
-    
-    support_ids = get_support_ids()
-    
-    for support_id in support_ids:
-        try:
-            if ticket.get("image"):
-                if ticket.get("file_type") == 'photo':
-                    await bot.send_photo(chat_id=support_id, photo=ticket["image"], caption=text, reply_markup=kb)
-                elif ticket.get("file_type") == 'document':
-                    await bot.send_document(chat_id=support_id, document=ticket["image"], caption=text, reply_markup=kb)
-            else:
-                await bot.send_message(chat_id=support_id, text=text, reply_markup=kb)
-        except Exception as e:
-            logger.error(f"Failed to notify support {support_id}: {e}")
+    text, kb = render_card(ticket)
+    attachments = ticket_attachments(ticket)
+
+    async def send(chat_id):
+        return await send_ticket_card(bot, chat_id, ticket['ticket_id'], attachments, text, kb)
+
+    results = await notify_support(send)
+    await record_notifications(ticket['ticket_id'], [r.message for r in results if r.ok])
+    return results
 
 async def notify_user(bot: Bot, chat_id: int, text: str):
     try:
@@ -189,7 +192,7 @@ async def server_call_reaction(query: types.CallbackQuery, bot: Bot):
     await query.answer()
 
 @router.message(F.text == "📨 Створити розсилку")
-async def start_broadcast(msg: types.Message, state: FSMContext):
+async def start_broadcast_form(msg: types.Message, state: FSMContext):
     await state.set_state(BroadcastForm.waiting_for_text)
     await msg.answer(
         "✍️ Введіть текст повідомлення для розсилки:",
@@ -264,7 +267,7 @@ async def show_broadcast_preview(msg: types.Message, state: FSMContext):
 @router.callback_query(BroadcastForm.waiting_for_confirm, F.data == "broadcast_cancel")
 async def cancel_broadcast(query: types.CallbackQuery, state: FSMContext):
     await state.clear()
-    kb = super_admin_main_menu() if is_super_admin(query.from_user.id) else support_main_menu()
+    kb = super_admin_main_menu() if await is_super_admin(query.from_user.id) else support_main_menu()
     await query.message.edit_reply_markup(reply_markup=None)
     await query.message.answer("❌ Розсилку скасовано.", reply_markup=kb)
     await query.answer()
@@ -276,72 +279,177 @@ async def send_broadcast(query: types.CallbackQuery, state: FSMContext, bot: Bot
     
     await query.message.edit_reply_markup(reply_markup=None)
     status_msg = await query.message.answer("⏳ Розсилка почалася...")
-    
-    users = get_all_users()
-    count_ok = 0
-    for user_id in users:
-        try:
-            if content_type == 'photo':
-                await bot.send_photo(chat_id=user_id, photo=content_id, caption=text)
-            elif content_type == 'video':
-                await bot.send_video(chat_id=user_id, video=content_id, caption=text)
-            elif content_type == 'document':
-                await bot.send_document(chat_id=user_id, document=content_id, caption=text)
-            else:
-                await bot.send_message(chat_id=user_id, text=text)
-            count_ok += 1
-        except Exception:
-            pass
-    
-    broadcasts_collection.insert_one({
-        "admin_id": admin_id,
-        "recipients_count": count_ok,
-        "date": datetime.utcnow()
-    })
-    
-    try:
-        await status_msg.delete()
-    except Exception:
-        pass
 
-    kb = super_admin_main_menu() if is_super_admin(query.from_user.id) else support_main_menu()
-    await query.message.answer(f"✅ Розсилку завершено! Успішно: {count_ok}", reply_markup=kb)
+    await start_broadcast(bot, admin_id, content_type, content_id, text, status_msg)
+
     await state.clear()
     await query.answer()
 
+async def render_active_dashboard(prio="all", cursor=None, direction="next"):
+    query = {"status": {"$in": ACTIVE_STATUSES}}
+    if prio in PRIORITY_FILTERS:
+        query["priority"] = PRIORITY_FILTERS[prio]
+
+    tickets, has_prev, has_next = await fetch_page(
+        tickets_collection, query, cursor, direction,
+        page_size=DASHBOARD_PAGE_SIZE,
+        projection={"_id": 0, "ticket_id": 1, "status": 1, "priority": 1, "name": 1, "description": 1, "created_at": 1}
+    )
+    total = await tickets_collection.count_documents(query)
+
+    filter_label = PRIORITY_FILTERS.get(prio, "Усі")
+    text = f"📢 <b>Активні заявки</b> | {filter_label} | всього: {total}\n\n"
+    if not tickets:
+        text += "✅ Активних заявок немає."
+
+    for ticket in tickets:
+        status_icon = "⏳" if ticket['status'] == PENDING else "👨‍💻"
+        prio_icon = PRIORITY_ICONS.get(ticket['priority'], "⚪️")
+        description = html.escape(ticket['description'][:DASHBOARD_SNIPPET])
+        name = html.escape(ticket['name'][:NAME_SNIPPET])
+        text += (
+            f"{status_icon} <b>#{ticket['ticket_id']}</b> {prio_icon} {ticket['created_at']:%d.%m %H:%M}\n"
+            f"👤 {name} — {description}\n\n"
+        )
+
+    first_cursor = encode_cursor(tickets[0]) if tickets else ""
+    last_cursor = encode_cursor(tickets[-1]) if tickets else ""
+    kb = active_tickets_kb(tickets, prio, first_cursor, last_cursor, has_prev, has_next)
+    return text, kb
+
 @router.message(F.text == "📢 Активні заявки")
 async def view_all_active_tickets(msg: types.Message):
-    tickets = list(tickets_collection.find({"status": {"$in": ["Очікує", "Прийнята"]}}).sort("created_at", 1))
+    text, kb = await render_active_dashboard()
+    await msg.answer(text, reply_markup=kb)
+
+@router.callback_query(F.data.startswith("tdash|"))
+async def paginate_active_tickets(query: types.CallbackQuery):
+    _, prio, direction, cursor = query.data.split("|", 3)
+    direction = {"n": "next", "p": "prev"}.get(direction, "next")
+    text, kb = await render_active_dashboard(prio, cursor or None, direction)
+
+    try:
+        await query.message.edit_text(text, reply_markup=kb)
+    except TelegramBadRequest:
+        pass
+    await query.answer()
+
+@router.callback_query(F.data.startswith("tview|"))
+async def view_ticket_card(query: types.CallbackQuery, bot: Bot):
+    ticket_id = query.data.split("|")[1]
+    ticket = await tickets_collection.find_one({"ticket_id": ticket_id})
+    if not ticket or ticket['status'] not in ACTIVE_STATUSES:
+        await query.answer("Вже не актуально.", show_alert=True)
+        return
+
+    text = (
+        f"<b>Заявка #{ticket['ticket_id']} ({ticket['status']})</b>\n"
+        f"👤 {ticket['name']} | 📞 {ticket['phone']}\n"
+        f"📄 {ticket['description']}\n"
+        f"⚙️ Пріоритет: {ticket['priority']}"
+    )
+    kb = support_accept_kb(ticket['ticket_id']) if ticket['status'] == PENDING else support_work_kb(ticket['ticket_id'])
+
+    message = await send_ticket_card(bot, query.message.chat.id, ticket['ticket_id'], ticket_attachments(ticket), text, kb)
+    await record_notifications(ticket['ticket_id'], [message])
+    await query.answer()
+
+@router.callback_query(F.data.startswith("tinfo|"))
+async def view_closed_ticket(query: types.CallbackQuery, bot: Bot):
+    ticket_id = query.data.split("|")[1]
+    ticket = await tickets_collection.find_one({"ticket_id": ticket_id})
+    if not ticket:
+        await query.answer("Заявку не знайдено.", show_alert=True)
+        return
+
+    text = (
+        f"<b>Заявка #{ticket['ticket_id']} ({ticket['status']})</b>\n"
+        f"👤 {ticket['name']} | 📞 {ticket['phone']}\n"
+        f"📄 {ticket['description']}\n"
+        f"⚙️ Пріоритет: {ticket['priority']}\n"
+        f"🗓 Створено: {ticket['created_at']:%d.%m.%Y %H:%M}"
+    )
+    if ticket.get('accepted_by'):
+        text += f"\n👨‍💻 Оператор: @{ticket['accepted_by']}"
+    if ticket.get('decline_reason'):
+        text += f"\n🛑 Причина: {html.escape(ticket['decline_reason'])}"
+    if ticket.get('first_response_sec') is not None:
+        text += f"\n⏱ Перша відповідь: {format_duration(ticket['first_response_sec'])}"
+    if ticket.get('resolution_sec') is not None:
+        text += f"\n🏁 Вирішено за: {format_duration(ticket['resolution_sec'])}"
+
+    await send_ticket_card(bot, query.message.chat.id, ticket['ticket_id'], ticket_attachments(ticket), text)
+    await query.answer()
+
+def format_search_row(ticket):
+    prio_icon = PRIORITY_ICONS.get(ticket['priority'], "⚪️")
+    description = html.escape(ticket['description'][:DASHBOARD_SNIPPET])
+    name = html.escape(ticket['name'][:NAME_SNIPPET])
+    return (
+        f"<b>#{ticket['ticket_id']}</b> {prio_icon} {ticket['status']} | {ticket['created_at']:%d.%m.%Y}\n"
+        f"👤 {name} | 📞 {ticket['phone']}\n{description}"
+    )
+
+async def render_search(search_query, offset=0):
+    tickets = await search_tickets(search_query, offset, SEARCH_PAGE_SIZE + 1)
+    has_next = len(tickets) > SEARCH_PAGE_SIZE
+    tickets = tickets[:SEARCH_PAGE_SIZE]
+
+    text = f"🔎 <b>Пошук:</b> {html.escape(search_query)}\n\n"
     if not tickets:
-        await msg.answer("✅ Активних заявок немає.")
+        return text + "Нічого не знайдено.", None
+    text += "\n\n".join(format_search_row(t) for t in tickets)
+    return text, search_results_kb(tickets, offset, has_next)
+
+@router.message(Command("search"))
+async def search_cmd(msg: types.Message, state: FSMContext, command: CommandObject):
+    if not command.args:
+        await msg.answer("🔎 Використання: <code>/search текст, телефон або номер заявки</code>")
         return
-    
-    for ticket in tickets:
-        text = (
-            f"<b>Заявка #{ticket['ticket_id']} ({ticket['status']})</b>\n"
-            f"👤 {ticket['name']} | 📞 {ticket['phone']}\n"
-            f"📄 {ticket['description']}\n"
-            f"⚙️ Пріоритет: {ticket['priority']}"
+
+    await state.update_data(search_query=command.args)
+    text, kb = await render_search(command.args)
+    await msg.answer(text, reply_markup=kb)
+
+@router.callback_query(F.data.startswith("srch|"))
+async def search_page(query: types.CallbackQuery, state: FSMContext):
+    search_query = (await state.get_data()).get("search_query")
+    if not search_query:
+        await query.answer("Пошук застарів, повторіть /search.", show_alert=True)
+        return
+
+    text, kb = await render_search(search_query, int(query.data.split("|")[1]))
+    try:
+        await query.message.edit_text(text, reply_markup=kb)
+    except TelegramBadRequest:
+        pass
+    await query.answer()
+
+@router.inline_query()
+async def search_inline(inline_query: types.InlineQuery):
+    if len(inline_query.query.strip()) < 2:
+        await inline_query.answer([], cache_time=5, is_personal=True)
+        return
+
+    offset = int(inline_query.offset or 0)
+    tickets = await search_tickets(inline_query.query, offset, SEARCH_PAGE_SIZE)
+    results = [
+        types.InlineQueryResultArticle(
+            id=t['ticket_id'],
+            title=f"#{t['ticket_id']} | {t['status']} | {t['priority']}",
+            description=f"{t['name']}: {t['description'][:100]}",
+            input_message_content=types.InputTextMessageContent(message_text=format_search_row(t))
         )
-        
-        kb = support_accept_kb(ticket['ticket_id']) if ticket['status'] == 'Очікує' else support_work_kb(ticket['ticket_id'])
-        
-        try:
-            if ticket.get("image"):
-                if ticket.get("file_type") == 'photo':
-                    await msg.answer_photo(photo=ticket["image"], caption=text, reply_markup=kb)
-                elif ticket.get("file_type") == 'document':
-                    await msg.answer_document(document=ticket["image"], caption=text, reply_markup=kb)
-            else:
-                await msg.answer(text, reply_markup=kb)
-        except Exception:
-            pass
+        for t in tickets
+    ]
+    next_offset = str(offset + len(tickets)) if len(tickets) == SEARCH_PAGE_SIZE else ""
+    await inline_query.answer(results, cache_time=5, is_personal=True, next_offset=next_offset)
 
 @router.message(F.text == "📖 Історія всіх заявок")
 async def view_history_all(msg: types.Message):
-    tickets = list(tickets_collection.find({
+    tickets = await tickets_collection.find({
         "status": {"$in": ["Завершена", "Відхилена", "Скасована"]}
-    }).sort("created_at", -1).limit(20))
+    }).sort("created_at", -1).limit(20).to_list(length=None)
 
     if not tickets:
         await msg.answer("Архів порожній.")
@@ -354,76 +462,134 @@ async def view_history_all(msg: types.Message):
              txt += f"\n🛑 Причина: {t['decline_reason']}"
         await msg.answer(txt)
 
+def format_duration(seconds):
+    if seconds is None:
+        return "—"
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{minutes} хв"
+    return f"{minutes // 60} год {minutes % 60} хв"
+
+def format_stats(stats):
+    by_status = stats.get("by_status", {})
+    text = f"📊 <b>Статистика заявок</b> (всього: {sum(by_status.values())})\n\n"
+    text += "\n".join(f"• {status}: {count}" for status, count in by_status.items() if count) + "\n\n"
+
+    by_priority = stats.get("by_priority", {})
+    text += "⚙️ " + " | ".join(f"{priority}: {count}" for priority, count in by_priority.items() if count) + "\n"
+    text += (
+        f"⏱ Медіана до прийняття: {format_duration(stats.get('median_accept_sec'))}\n"
+        f"🏁 Медіана до завершення: {format_duration(stats.get('median_complete_sec'))}\n\n"
+    )
+
+    operators = sorted(stats.get("operators", {}).values(), key=lambda o: o.get("completed", 0), reverse=True)
+    if operators:
+        text += "👨‍💻 <b>Навантаження:</b>\n"
+        for o in operators[:10]:
+            name = html.escape(f"@{o['name']}" if o.get("name") else "—")
+            text += f"{name}: в роботі {o.get('active', 0)}, завершено {o.get('completed', 0)}, відхилено {o.get('rejected', 0)}\n"
+        text += "\n"
+
+    daily = sorted(stats.get("daily", {}).items())[-STATS_DAYS:]
+    if daily:
+        text += "📅 <b>По днях:</b>\n" + "\n".join(f"{day[8:]}.{day[5:7]}: {count}" for day, count in daily) + "\n\n"
+    text += f"<i>Оновлено повністю: {stats['built_at']:%d.%m %H:%M} UTC</i>"
+    return text
+
 @router.message(F.text == "⚙️ Стан БД")
 async def check_db_status(msg: types.Message):
     try:
-        db.command("ping")
-        count = tickets_collection.count_documents({})
-        await msg.answer(f"✅ З'єднання стабільне.\nВсього заявок у базі: {count}")
+        await db.command("ping")
+        cache = role_cache.stats()
+        await msg.answer(
+            f"✅ З'єднання стабільне.\n"
+            f"🗂 Кеш ролей: {cache['hits']} влучань / {cache['misses']} промахів ({cache['size']} адмінів)"
+        )
     except Exception as e:
         await msg.answer(f"❌ Помилка з'єднання: {e}")
+        return
+
+    if await is_super_admin(msg.from_user.id):
+        stats = await get_stats()
+        if stats:
+            await msg.answer(format_stats(stats))
+
+@router.message(Command("errors"))
+async def show_recent_errors(msg: types.Message):
+    if not await is_super_admin(msg.from_user.id): return
+
+    top = error_aggregator.top()
+    if not error_aggregator.recent:
+        await msg.answer("✅ Помилок з моменту запуску не було.")
+        return
+
+    text = "🚨 <b>Найчастіші помилки:</b>\n"
+    for group, count in top:
+        text += f"<code>{group.key}</code> {group.error_type} ×{count} (всього {group.total})\n📍 <code>{html.escape(group.location)}</code>\n"
+
+    text += "\n🕒 <b>Останні:</b>\n"
+    for error in list(error_aggregator.recent)[-10:][::-1]:
+        text += f"{error['at']:%d.%m %H:%M:%S} <code>{error['key']}</code> {error['type']}: {html.escape(error['message'][:100])}\n"
+    await msg.answer(text)
+
+@router.message(Command("explain"))
+async def explain_queries(msg: types.Message):
+    if not await is_super_admin(msg.from_user.id): return
+
+    report = await explain_hot_queries()
+    text = "🔎 <b>Плани гарячих запитів:</b>\n\n"
+    for name, stages in report.items():
+        icon = "🐢" if "COLLSCAN" in stages else "⚡️"
+        text += f"{icon} <b>{name}</b>: {' → '.join(stages)}\n"
+
+    collscans = sum("COLLSCAN" in stages for stages in report.values())
+    text += f"\n{'⚠️ COLLSCAN: ' + str(collscans) if collscans else '✅ Усі запити використовують індекси.'}"
+    await msg.answer(text)
+
+async def refresh_own_card(bot: Bot, query: types.CallbackQuery, ticket):
+    text, kb = render_card(ticket, query.from_user.id)
+    note = {"chat_id": query.message.chat.id, "message_id": query.message.message_id, "caption": query.message.caption is not None}
+    try:
+        await edit_card(bot, note, text, kb)
+    except Exception:
+        pass
 
 @router.callback_query(F.data.startswith("accept|"))
 async def accept_ticket(query: types.CallbackQuery, bot: Bot):
     ticket_id = query.data.split("|")[1]
-    ticket = tickets_collection.find_one({"ticket_id": ticket_id})
-    
-    if not ticket or ticket["status"] != "Очікує":
+    ticket = await transition(
+        ticket_id, ACCEPTED,
+        {"accepted_by": query.from_user.username, "accepted_by_id": query.from_user.id}
+    )
+
+    if not ticket:
         await query.answer("Вже не актуально.", show_alert=True)
         return
 
-    tickets_collection.update_one(
-        {"ticket_id": ticket_id},
-        {"$set": {"status": "Прийнята", "accepted_by": query.from_user.username}}
-    )
-    
     await notify_user(bot, ticket["telegram_id"], 
                       f"👨‍💻 Вашу заявку #{ticket_id} прийняв оператор @{query.from_user.username}.")
 
-    new_text = (
-        f"<b>Заявка #{ticket_id} (В роботі)</b>\n"
-        f"👤 {ticket['name']} | 📞 {ticket['phone']}\n"
-        f"📄 {ticket['description']}\n"
-        f"👨‍💻 <b>Прийняв:</b> @{query.from_user.username}"
-    )
-    
-    try:
-        if query.message.caption:
-            await query.message.edit_caption(caption=new_text, reply_markup=support_work_kb(ticket_id))
-        else:
-            await query.message.edit_text(new_text, reply_markup=support_work_kb(ticket_id))
-    except Exception:
-        pass
+    await refresh_own_card(bot, query, ticket)
     await query.answer("Ви прийняли заявку!")
 
 @router.callback_query(F.data.startswith("complete|"))
 async def complete_ticket(query: types.CallbackQuery, bot: Bot): 
     ticket_id = query.data.split("|")[1]
-    ticket = tickets_collection.find_one({"ticket_id": ticket_id})
+    ticket = await transition(ticket_id, COMPLETED)
+
+    if not ticket:
+        await query.answer("Вже не актуально.", show_alert=True)
+        return
 
-    if not ticket or ticket['status'] != "Прийнята":
-         return
-    
-    tickets_collection.update_one(
-        {"ticket_id": ticket_id},
-        {"$set": {"status": "Завершена"}}
-    )
-    
     await notify_user(bot, ticket["telegram_id"], f"✅ Вашу заявку #{ticket_id} успішно виконано.")
 
-    try:
-        if query.message.caption:
-            await query.message.edit_caption(caption=f"✅ Заявка #{ticket_id} завершена.")
-        else:
-            await query.message.edit_text(f"✅ Заявка #{ticket_id} завершена.")
-    except Exception:
-        pass
+    await refresh_own_card(bot, query, ticket)
     await query.answer("Готово!")
 
 @router.callback_query(F.data.startswith("reject|"))
 async def reject_ticket_start(query: types.CallbackQuery, state: FSMContext):
     ticket_id = query.data.split("|")[1]
-    ticket = tickets_collection.find_one({"ticket_id": ticket_id})
+    ticket = await tickets_collection.find_one({"ticket_id": ticket_id})
     
     if not ticket:
          return
@@ -444,15 +610,14 @@ async def process_rejection_reason(msg: types.Message, state: FSMContext, bot: B
     ticket_id = data["ticket_id"]
     reason = msg.text
 
-    tickets_collection.update_one(
-        {"ticket_id": ticket_id},
-        {"$set": {"status": "Відхилена", "decline_reason": reason}}
-    )
+    ticket = await transition(ticket_id, REJECTED, {"decline_reason": reason})
+    if not ticket:
+        await msg.answer(f"⚠️ Заявка #{ticket_id} вже не актуальна.")
+        await state.clear()
+        return
 
-    ticket = tickets_collection.find_one({"ticket_id": ticket_id})
-    if ticket:
-        await notify_user(bot, ticket["telegram_id"], 
-                          f"❌ Вашу заявку #{ticket_id} відхилено.\n<b>Причина:</b> {reason}")
+    await notify_user(bot, ticket["telegram_id"], 
+                      f"❌ Вашу заявку #{ticket_id} відхилено.\n<b>Причина:</b> {reason}")
 
     try:
         await bot.edit_message_reply_markup(
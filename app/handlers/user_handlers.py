@@ -1,17 +1,26 @@
+import html
 import uuid
 import re
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from aiogram import F, types, Bot, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.exceptions import TelegramBadRequest
+from pymongo import DESCENDING
 
-from app.db.database import users_collection, tickets_collection, get_support_ids
-from app.keyboards.user_keyboards import main_menu, contact_request_kb, skip_button, priority_keyboard
+from config import HISTORY_PAGE_SIZE, HISTORY_SNIPPET, MAX_ATTACHMENTS
+
+from app.db.database import tickets_collection, register_user
+from app.keyboards.user_keyboards import main_menu, contact_request_kb, skip_button, priority_keyboard, history_nav_kb
 from app.keyboards.support_keyboards import server_call_kb
 from app.fsm.user_forms import TicketForm
+from app.db.ticket_states import transition, CANCELLED
+from app.db.pagination import fetch_page, encode_cursor
+from app.db.stats import record_created
+from app.utils.notifier import notify_support
+from app.utils.attachments import extract_attachment, media_groups
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -19,13 +28,7 @@ logger = logging.getLogger(__name__)
 @router.message(Command("start"))
 async def start_cmd(msg: types.Message):
     try:
-        user = users_collection.find_one({"telegram_id": msg.from_user.id})
-        if not user:
-            users_collection.insert_one({
-                "telegram_id": msg.from_user.id,
-                "username": msg.from_user.username,
-                "registered_at": datetime.utcnow()
-            })
+        if await register_user(msg.from_user.id, msg.from_user.username):
             logger.info(f"New user registered: {msg.from_user.id}")
         
         await msg.answer("👋 Вітаю у боті техпідтримки!", reply_markup=main_menu())
@@ -36,25 +39,9 @@ async def start_cmd(msg: types.Message):
 async def call_server_room(msg: types.Message, bot: Bot):
     initiator_id = msg.from_user.id
     
-    user = users_collection.find_one({"telegram_id": initiator_id})
-    if user and user.get("last_call_at"):
-        last_call = user["last_call_at"]
-        time_passed = datetime.utcnow() - last_call
-        if time_passed < timedelta(minutes=5):
-            wait_min = 5 - int(time_passed.total_seconds() / 60)
-            logger.warning(f"User {initiator_id} spam attempt blocked (wait {wait_min}m)")
-            await msg.answer(f"⏳ Занадто часто! Спробуйте через {wait_min} хв.")
-            return
-
-    users_collection.update_one(
-        {"telegram_id": initiator_id},
-        {"$set": {"last_call_at": datetime.utcnow()}},
-        upsert=True
-    )
-
     logger.info(f"User {initiator_id} initiated server room call")
     
-    last_ticket = tickets_collection.find_one(
+    last_ticket = await tickets_collection.find_one(
         {"telegram_id": initiator_id},
         sort=[("created_at", -1)]
     )
@@ -66,20 +53,10 @@ async def call_server_room(msg: types.Message, bot: Bot):
         f"📞 Тел: <b>{user_phone}</b>"
     )
     
-    support_ids = get_support_ids()
-    count = 0
-    
-    for support_id in support_ids:
-        try:
-            await bot.send_message(
-                chat_id=support_id, 
-                text=alert_text, 
-                reply_markup=server_call_kb(initiator_id)
-            )
-            count += 1
-        except Exception as e:
-            logger.error(f"Failed to send alert to {support_id}: {e}")
-            
+    kb = server_call_kb(initiator_id)
+    results = await notify_support(lambda chat_id: bot.send_message(chat_id=chat_id, text=alert_text, reply_markup=kb))
+    logger.info(f"Server room call from {initiator_id} delivered to {sum(r.ok for r in results)}/{len(results)} staff")
+
     await msg.answer(f"✅ Сповіщення надіслано.", reply_markup=main_menu())
 
 @router.message(F.text == "📝 Створити заявку")
@@ -90,7 +67,7 @@ async def create_ticket(msg: types.Message, state: FSMContext):
 
 @router.message(TicketForm.name, F.text)
 async def get_name(msg: types.Message, state: FSMContext):
-    logger.info(f"User {msg.from_user.id} entered name: {msg.text}")
+    logger.info(f"User {msg.from_user.id} entered name")
     await state.update_data(name=msg.text)
     await msg.answer("Надішліть свій номер телефону:", reply_markup=contact_request_kb())
     await state.set_state(TicketForm.phone)
@@ -102,7 +79,7 @@ async def get_name_invalid(msg: types.Message):
 
 @router.message(TicketForm.phone, F.contact)
 async def get_phone_contact(msg: types.Message, state: FSMContext):
-    logger.info(f"User {msg.from_user.id} sent contact: {msg.contact.phone_number}")
+    logger.info(f"User {msg.from_user.id} sent contact")
     await state.update_data(phone=msg.contact.phone_number)
     await msg.answer("Введіть деталі заявки:", reply_markup=ReplyKeyboardRemove())
     await state.set_state(TicketForm.description)
@@ -113,11 +90,11 @@ async def get_phone_text(msg: types.Message, state: FSMContext):
     clean_phone = re.sub(r'[^\d+]', '', phone_input)
     
     if not re.match(r'^\+?\d{10,15}$', clean_phone):
-        logger.warning(f"User {msg.from_user.id} entered invalid phone: {phone_input}")
+        logger.warning(f"User {msg.from_user.id} entered invalid phone")
         await msg.answer("❌ Некоректний формат.\nВведіть 10-15 цифр (наприклад 0991234567):")
         return
 
-    logger.info(f"User {msg.from_user.id} entered phone text: {clean_phone}")
+    logger.info(f"User {msg.from_user.id} entered phone as text")
     await state.update_data(phone=clean_phone)
     await msg.answer("Опишіть проблему:", reply_markup=ReplyKeyboardRemove())
     await state.set_state(TicketForm.description)
@@ -131,7 +108,7 @@ async def get_phone_invalid(msg: types.Message):
 async def get_description(msg: types.Message, state: FSMContext):
     logger.info(f"User {msg.from_user.id} entered description")
     await state.update_data(description=msg.text)
-    await msg.answer("Додайте скріншот/файл або натисніть 'Пропустити'", reply_markup=skip_button())
+    await msg.answer(f"Додайте скріншот/файл (або альбом до {MAX_ATTACHMENTS} файлів) чи натисніть 'Пропустити'", reply_markup=skip_button())
     await state.set_state(TicketForm.image)
 
 @router.message(TicketForm.description)
@@ -139,31 +116,37 @@ async def get_description_invalid(msg: types.Message):
     logger.warning(f"User {msg.from_user.id} sent invalid description type")
     await msg.answer("❌ Спочатку опишіть проблему текстом.")
 
-@router.message(TicketForm.image, F.photo)
-async def get_image_photo(msg: types.Message, state: FSMContext):
-    logger.info(f"User {msg.from_user.id} attached photo")
-    await state.update_data(image=msg.photo[-1].file_id, file_type='photo')
-    await msg.answer("Оберіть пріоритет заявки:", reply_markup=priority_keyboard())
-    await state.set_state(TicketForm.priority)
+@router.message(TicketForm.image, F.photo | F.document | F.video)
+async def get_attachments(msg: types.Message, state: FSMContext):
+    attachment = extract_attachment(msg)
+    if msg.media_group_id:
+        items = await media_groups.collect((msg.chat.id, msg.media_group_id), (msg.message_id, attachment))
+        if items is None:
+            return
+        attachments = [a for _, a in sorted(items, key=lambda item: item[0])]
+    else:
+        attachments = [attachment]
+
+    if len(attachments) > MAX_ATTACHMENTS:
+        await msg.answer(f"⚠️ Збережено лише перші {MAX_ATTACHMENTS} файлів.")
+        attachments = attachments[:MAX_ATTACHMENTS]
 
-@router.message(TicketForm.image, F.document)
-async def get_image_doc(msg: types.Message, state: FSMContext):
-    logger.info(f"User {msg.from_user.id} attached document")
-    await state.update_data(image=msg.document.file_id, file_type='document')
+    logger.info(f"User {msg.from_user.id} attached {len(attachments)} files")
+    await state.update_data(attachments=attachments)
     await msg.answer("Оберіть пріоритет заявки:", reply_markup=priority_keyboard())
     await state.set_state(TicketForm.priority)
 
 @router.message(TicketForm.image, F.text == "Пропустити")
 async def skip_image(msg: types.Message, state: FSMContext):
     logger.info(f"User {msg.from_user.id} skipped image upload")
-    await state.update_data(image=None, file_type=None)
+    await state.update_data(attachments=[])
     await msg.answer("Оберіть пріоритет заявки:", reply_markup=priority_keyboard())
     await state.set_state(TicketForm.priority)
 
 @router.message(TicketForm.image)
 async def invalid_image_input(msg: types.Message):
     logger.warning(f"User {msg.from_user.id} sent invalid image input")
-    await msg.answer("📷 Надішліть фото/файл або натисніть кнопку 'Пропустити'.")
+    await msg.answer("📷 Надішліть фото, відео чи файл або натисніть кнопку 'Пропустити'.")
 
 @router.message(TicketForm.priority)
 async def get_priority(msg: types.Message, state: FSMContext, bot: Bot):
@@ -184,8 +167,7 @@ async def get_priority(msg: types.Message, state: FSMContext, bot: Bot):
         "name": data["name"],
         "phone": data["phone"],
         "description": data["description"],
-        "image": data.get("image"),
-        "file_type": data.get("file_type"),
+        "attachments": data.get("attachments", []),
         "priority": priority,
         "status": "Очікує",
         "created_at": datetime.utcnow(),
@@ -194,7 +176,8 @@ async def get_priority(msg: types.Message, state: FSMContext, bot: Bot):
     }
     
     try:
-        tickets_collection.insert_one(ticket)
+        await tickets_collection.insert_one(ticket)
+        await record_created(ticket)
         logger.info(f"Ticket #{ticket_id} created by User {msg.from_user.id}")
         await msg.answer("✅ Заявку створено! Очікуйте відповіді.", reply_markup=main_menu())
         
@@ -207,28 +190,58 @@ async def get_priority(msg: types.Message, state: FSMContext, bot: Bot):
 
     await state.clear()
 
+async def render_history(user_id, cursor=None, direction="next"):
+    tickets, has_prev, has_next = await fetch_page(
+        tickets_collection, {"telegram_id": user_id}, cursor, direction,
+        order=DESCENDING,
+        page_size=HISTORY_PAGE_SIZE,
+        projection={"_id": 0, "ticket_id": 1, "status": 1, "priority": 1, "description": 1, "decline_reason": 1, "created_at": 1}
+    )
+    if not tickets:
+        return None, None
+
+    text = "📜 <b>Ваші заявки:</b>\n\n"
+    for t in tickets:
+        status_emoji = "⏳" if t['status'] == "Очікує" else "✅" if t['status'] == "Завершена" else "❌"
+        description = t['description']
+        if len(description) > HISTORY_SNIPPET:
+            description = description[:HISTORY_SNIPPET] + "…"
+        text += f"<b>#{t['ticket_id']} | {status_emoji} {t['status']} | {t['priority']}</b>\n{html.escape(description)}\n"
+        if t['status'] == 'Відхилена' and t.get('decline_reason'):
+            text += f"🛑 <b>Причина відхилення:</b> {html.escape(t['decline_reason'][:HISTORY_SNIPPET])}\n"
+        text += "\n"
+
+    kb = history_nav_kb(encode_cursor(tickets[0]), encode_cursor(tickets[-1]), has_prev, has_next)
+    return text, kb
+
 @router.message(F.text == "📜 Історія заявок")
 async def history(msg: types.Message):
     logger.info(f"User {msg.from_user.id} requested history")
-    tickets = list(tickets_collection.find({"telegram_id": msg.from_user.id}).sort("created_at", -1))
-    
-    if not tickets:
+    text, kb = await render_history(msg.from_user.id)
+
+    if not text:
         await msg.answer("У вас ще немає заявок.")
         return
-    
-    for t in tickets:
-        status_emoji = "⏳" if t['status'] == "Очікує" else "✅" if t['status'] == "Завершена" else "❌"
-        txt = f"<b>#{t['ticket_id']} | {status_emoji} {t['status']} | {t['priority']}</b>\n{t['description']}"
-        if t['status'] == 'Відхилена' and t.get('decline_reason'):
-            txt += f"\n\n🛑 <b>Причина відхилення:</b> {t['decline_reason']}"
-        await msg.answer(txt)
+    await msg.answer(text, reply_markup=kb)
+
+@router.callback_query(F.data.startswith("uhist|"))
+async def history_page(cb: types.CallbackQuery):
+    _, direction, cursor = cb.data.split("|", 2)
+    text, kb = await render_history(cb.from_user.id, cursor, "prev" if direction == "p" else "next")
+
+    if text:
+        try:
+            await cb.message.edit_text(text, reply_markup=kb)
+        except TelegramBadRequest:
+            pass
+    await cb.answer()
 
 @router.message(F.text == "❌ Скасувати заявку")
 async def cancel_list(msg: types.Message):
-    tickets = list(tickets_collection.find({
+    tickets = await tickets_collection.find({
         "telegram_id": msg.from_user.id,
         "status": {"$in": ["Очікує", "Прийнята"]}
-    }))
+    }).to_list(length=None)
     
     if not tickets:
         await msg.answer("Немає активних заявок для скасування.")
@@ -245,25 +258,21 @@ async def cancel_list(msg: types.Message):
 @router.callback_query(F.data.startswith("user_cancel|"))
 async def user_cancel(cb: types.CallbackQuery):
     ticket_id = cb.data.split("|")[1]
-    ticket = tickets_collection.find_one({"ticket_id": ticket_id})
-    
-    if not ticket or ticket["telegram_id"] != cb.from_user.id:
-        await cb.answer("Помилка доступу або заявка не знайдена.", show_alert=True)
-        return
-    
-    if ticket.get("status") in ["Скасована", "Відхилена", "Завершена"]:
+    ticket = await transition(ticket_id, CANCELLED, owner_id=cb.from_user.id)
+
+    if not ticket:
+        existing = await tickets_collection.find_one({"ticket_id": ticket_id}, {"telegram_id": 1})
+        if not existing or existing["telegram_id"] != cb.from_user.id:
+            await cb.answer("Помилка доступу або заявка не знайдена.", show_alert=True)
+            return
+
         await cb.answer("Ця заявка вже закрита.", show_alert=True)
         try:
             await cb.message.edit_text("Ця заявка вже не активна.")
         except TelegramBadRequest:
             pass
         return
-    
-    tickets_collection.update_one(
-        {"ticket_id": ticket_id},
-        {"$set": {"status": "Скасована"}}
-    )
-    
+
     logger.info(f"Користувач {cb.from_user.id} скасував заявку {ticket_id}")
     
     try:
@@ -1,34 +1,61 @@
+from functools import lru_cache
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from config import KEYBOARD_CACHE_SIZE
+from app.db.ticket_states import ACTIVE_STATUSES
+
+SUPPORT_MAIN_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📢 Активні заявки"), KeyboardButton(text="📨 Створити розсилку")],
+        [KeyboardButton(text="📖 Історія всіх заявок"), KeyboardButton(text="⚙️ Стан БД")]
+    ],
+    resize_keyboard=True
+)
+
+SUPER_ADMIN_MAIN_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📢 Активні заявки"), KeyboardButton(text="📨 Створити розсилку")],
+        [KeyboardButton(text="📖 Історія всіх заявок"), KeyboardButton(text="⚙️ Стан БД")],
+        [KeyboardButton(text="👥 Керування персоналом")]
+    ],
+    resize_keyboard=True
+)
+
+ADMIN_MANAGEMENT_REPLY_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="➕ Додати адміна"), KeyboardButton(text="➖ Видалити адміна")],
+        [KeyboardButton(text="📋 Список адмінів")],
+        [KeyboardButton(text="🔙 Назад до головного меню")]
+    ],
+    resize_keyboard=True
+)
+
+CANCEL_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔙 Скасувати", callback_data="admin_cancel")]
+])
+
+BROADCAST_CONFIRM_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="✅ Надіслати", callback_data="broadcast_send"),
+        InlineKeyboardButton(text="❌ Скасувати", callback_data="broadcast_cancel")
+    ]
+])
+
+SKIP_MEDIA_KB = ReplyKeyboardMarkup(
+    keyboard=[[KeyboardButton(text="Пропустити")]],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+
 def support_main_menu():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📢 Активні заявки"), KeyboardButton(text="📨 Створити розсилку")],
-            [KeyboardButton(text="📖 Історія всіх заявок"), KeyboardButton(text="⚙️ Стан БД")]
-        ],
-        resize_keyboard=True
-    )
+    return SUPPORT_MAIN_MENU
 
 def super_admin_main_menu():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📢 Активні заявки"), KeyboardButton(text="📨 Створити розсилку")],
-            [KeyboardButton(text="📖 Історія всіх заявок"), KeyboardButton(text="⚙️ Стан БД")],
-            [KeyboardButton(text="👥 Керування персоналом")]
-        ],
-        resize_keyboard=True
-    )
+    return SUPER_ADMIN_MAIN_MENU
 
 def admin_management_reply_kb():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="➕ Додати адміна"), KeyboardButton(text="➖ Видалити адміна")],
-            [KeyboardButton(text="📋 Список адмінів")],
-            [KeyboardButton(text="🔙 Назад до головного меню")]
-        ],
-        resize_keyboard=True
-    )
+    return ADMIN_MANAGEMENT_REPLY_KB
 
 def delete_admin_list_kb(admins_list):
     builder = InlineKeyboardBuilder()
@@ -44,39 +71,72 @@ def delete_admin_list_kb(admins_list):
     return builder.as_markup()
 
 def cancel_kb():
-    builder = InlineKeyboardBuilder()
-    builder.button(text="🔙 Скасувати", callback_data="admin_cancel")
-    return builder.as_markup()
+    return CANCEL_KB
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def support_accept_kb(ticket_id):
-    builder = InlineKeyboardBuilder()
-    builder.button(text="✅ Прийняти", callback_data=f"accept|{ticket_id}")
-    builder.button(text="❌ Відхилити", callback_data=f"reject|{ticket_id}")
-    builder.adjust(1)
-    return builder.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✅ Прийняти", callback_data=f"accept|{ticket_id}")],
+        [InlineKeyboardButton(text="❌ Відхилити", callback_data=f"reject|{ticket_id}")]
+    ])
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def support_work_kb(ticket_id):
-    builder = InlineKeyboardBuilder()
-    builder.button(text="✅ Завершити виконання", callback_data=f"complete|{ticket_id}")
-    return builder.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✅ Завершити виконання", callback_data=f"complete|{ticket_id}")]
+    ])
 
-def server_call_kb(initiator_id):
+PRIORITY_FILTERS = {"L": "Низький", "M": "Середній", "H": "Високий"}
+PRIORITY_ICONS = {"Низький": "🔵", "Середній": "🟡", "Високий": "🔴"}
+
+def active_tickets_kb(tickets, prio, first_cursor, last_cursor, has_prev, has_next):
     builder = InlineKeyboardBuilder()
-    builder.button(text="👍", callback_data=f"srv_reply|yes|{initiator_id}")
-    builder.button(text="👎", callback_data=f"srv_reply|no|{initiator_id}")
+    for ticket in tickets:
+        builder.button(text=f"🔍 #{ticket['ticket_id']}", callback_data=f"tview|{ticket['ticket_id']}")
     builder.adjust(2)
+
+    nav = []
+    if has_prev:
+        nav.append(InlineKeyboardButton(text="◀️", callback_data=f"tdash|{prio}|p|{first_cursor}"))
+    nav.append(InlineKeyboardButton(text="🔄", callback_data=f"tdash|{prio}|f|"))
+    if has_next:
+        nav.append(InlineKeyboardButton(text="▶️", callback_data=f"tdash|{prio}|n|{last_cursor}"))
+    builder.row(*nav)
+
+    filters = [("all", "Усі")] + [(code, PRIORITY_ICONS[name]) for code, name in PRIORITY_FILTERS.items()]
+    builder.row(*[
+        InlineKeyboardButton(text=f"• {label} •" if code == prio else label, callback_data=f"tdash|{code}|f|")
+        for code, label in filters
+    ])
     return builder.as_markup()
 
-def broadcast_confirm_kb():
+def search_results_kb(tickets, offset, has_next):
     builder = InlineKeyboardBuilder()
-    builder.button(text="✅ Надіслати", callback_data="broadcast_send")
-    builder.button(text="❌ Скасувати", callback_data="broadcast_cancel")
+    for ticket in tickets:
+        view = "tview" if ticket['status'] in ACTIVE_STATUSES else "tinfo"
+        builder.button(text=f"🔍 #{ticket['ticket_id']}", callback_data=f"{view}|{ticket['ticket_id']}")
     builder.adjust(2)
+
+    nav = []
+    if offset > 0:
+        nav.append(InlineKeyboardButton(text="◀️", callback_data=f"srch|{max(offset - len(tickets), 0)}"))
+    if has_next:
+        nav.append(InlineKeyboardButton(text="▶️", callback_data=f"srch|{offset + len(tickets)}"))
+    if nav:
+        builder.row(*nav)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def server_call_kb(initiator_id):
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="👍", callback_data=f"srv_reply|yes|{initiator_id}"),
+            InlineKeyboardButton(text="👎", callback_data=f"srv_reply|no|{initiator_id}")
+        ]
+    ])
+
+def broadcast_confirm_kb():
+    return BROADCAST_CONFIRM_KB
+
 def skip_media_kb():
-    return ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="Пропустити")]],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
\ No newline at end of file
+    return SKIP_MEDIA_KB
\ No newline at end of file
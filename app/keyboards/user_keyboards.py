@@ -1,41 +1,56 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+
+MAIN_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📝 Створити заявку")],
+        [KeyboardButton(text="📜 Історія заявок"), KeyboardButton(text="🔔 Виклик в серверну")],
+        [KeyboardButton(text="❌ Скасувати заявку")]
+    ],
+    resize_keyboard=True
+)
+
+CONTACT_REQUEST_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📞 Надіслати номер телефону", request_contact=True)]
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+
+SKIP_BUTTON = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="Пропустити")]
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+
+PRIORITY_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="🔵 Низький")],
+        [KeyboardButton(text="🟡 Середній")],
+        [KeyboardButton(text="🔴 Високий")]
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
 
 def main_menu():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📝 Створити заявку")],
-            # Змінив текст кнопки тут:
-            [KeyboardButton(text="📜 Історія заявок"), KeyboardButton(text="🔔 Виклик в серверну")],
-            [KeyboardButton(text="❌ Скасувати заявку")]
-        ],
-        resize_keyboard=True
-    )
+    return MAIN_MENU
 
 def contact_request_kb():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📞 Надіслати номер телефону", request_contact=True)]
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
+    return CONTACT_REQUEST_KB
 
 def skip_button():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="Пропустити")]
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
+    return SKIP_BUTTON
 
 def priority_keyboard():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🔵 Низький")],
-            [KeyboardButton(text="🟡 Середній")],
-            [KeyboardButton(text="🔴 Високий")]
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
\ No newline at end of file
+    return PRIORITY_KEYBOARD
+
+def history_nav_kb(first_cursor, last_cursor, has_prev, has_next):
+    nav = []
+    if has_prev:
+        nav.append(InlineKeyboardButton(text="◀️ Новіші", callback_data=f"uhist|p|{first_cursor}"))
+    if has_next:
+        nav.append(InlineKeyboardButton(text="Старіші ▶️", callback_data=f"uhist|n|{last_cursor}"))
+    return InlineKeyboardMarkup(inline_keyboard=[nav]) if nav else None
\ No newline at end of file
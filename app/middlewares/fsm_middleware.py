@@ -0,0 +1,17 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from app.fsm.storage import CoalescingStorage
+
+class FSMBatchMiddleware(BaseMiddleware):
+    def __init__(self, storage: CoalescingStorage):
+        self.storage = storage
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.storage.batch():
+            return await handler(event, data)
\ No newline at end of file
@@ -0,0 +1,26 @@
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.utils.logging_setup import set_log_context, reset_log_context
+
+logger = logging.getLogger("app.updates")
+
+class LogContextMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        token = set_log_context(update_id=event.update_id, user_id=user.id if user else None)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            duration = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"Update {event.event_type} handled in {duration} ms", extra={"duration": duration})
+            reset_log_context(token)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from app.utils.send_queue import send_queue, is_queued
+
+class OutboundQueueMiddleware(BaseRequestMiddleware):
+    def __init__(self, queue=send_queue):
+        self.queue = queue
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        if not is_queued(method):
+            return await make_request(bot, method)
+        return await self.queue.submit(make_request, bot, method)
\ No newline at end of file
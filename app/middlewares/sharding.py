@@ -0,0 +1,21 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.utils.update_queue import update_queue
+
+class ShardingMiddleware(BaseMiddleware):
+    def __init__(self, queue=update_queue):
+        self.queue = queue
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat else user.id if user else event.update_id
+        await self.queue.push(event, key)
+        return None
\ No newline at end of file
@@ -0,0 +1,63 @@
+import math
+from typing import Any, Awaitable, Callable, Dict, NamedTuple
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from config import THROTTLE_RATE, THROTTLE_BURST, SERVER_CALL_COOLDOWN, MAX_ATTACHMENTS
+from app.utils import metrics
+
+throttled_total = metrics.Counter("bot_throttled_updates_total", "Updates dropped by the rate limiter", ["rule"])
+
+class ThrottleRule(NamedTuple):
+    name: str
+    match: Callable[[Update], bool]
+    rate: float
+    capacity: float
+    reply: str | None = None
+
+def _message_text(update: Update):
+    return update.message.text if update.message else None
+
+RULES = [
+    ThrottleRule(
+        "server_call",
+        lambda update: _message_text(update) == "🔔 Виклик в серверну",
+        rate=1 / SERVER_CALL_COOLDOWN,
+        capacity=1,
+        reply="⏳ Занадто часто! Спробуйте через {wait_min} хв."
+    ),
+    ThrottleRule(
+        "media_group",
+        lambda update: bool(update.message and update.message.media_group_id),
+        rate=THROTTLE_RATE,
+        capacity=MAX_ATTACHMENTS
+    ),
+    ThrottleRule("default", lambda update: True, rate=THROTTLE_RATE, capacity=THROTTLE_BURST),
+]
+
+class ThrottlingMiddleware(BaseMiddleware):
+    def __init__(self, store, rules=RULES):
+        self.store = store
+        self.rules = rules
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if not user:
+            return await handler(event, data)
+
+        rule = next(rule for rule in self.rules if rule.match(event))
+        wait = await self.store.consume(f"{rule.name}:{user.id}", rule.rate, rule.capacity)
+        if not wait:
+            return await handler(event, data)
+
+        throttled_total.inc(rule.name)
+        if rule.reply and event.message:
+            await event.message.answer(rule.reply.format(wait_min=math.ceil(wait / 60)))
+        elif event.callback_query:
+            await event.callback_query.answer("⏳ Занадто часто!")
+        return None
\ No newline at end of file
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from aiogram import Bot
+from aiogram.types import InputMediaPhoto, InputMediaVideo, InputMediaDocument, ReplyParameters
+
+from config import MEDIA_GROUP_DEBOUNCE, MEDIA_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+MEDIA_GROUP_LIMIT = 10
+INPUT_MEDIA = {"photo": InputMediaPhoto, "video": InputMediaVideo, "document": InputMediaDocument}
+
+def extract_attachment(msg):
+    if msg.photo:
+        photo = msg.photo[-1]
+        return {"kind": "photo", "file_id": photo.file_id, "unique_id": photo.file_unique_id, "size": photo.file_size, "mime": "image/jpeg", "name": None}
+    media = msg.video or msg.document
+    if media:
+        return {
+            "kind": "video" if msg.video else "document",
+            "file_id": media.file_id,
+            "unique_id": media.file_unique_id,
+            "size": media.file_size,
+            "mime": media.mime_type,
+            "name": media.file_name
+        }
+    return None
+
+def ticket_attachments(ticket):
+    if ticket.get("attachments"):
+        return ticket["attachments"]
+    if ticket.get("image"):
+        return [{"kind": ticket.get("file_type") or "document", "file_id": ticket["image"]}]
+    return []
+
+def _media_groups(attachments):
+    visual = [a for a in attachments if a["kind"] in ("photo", "video")]
+    documents = [a for a in attachments if a["kind"] == "document"]
+    groups = []
+    for items in (visual, documents):
+        groups += [items[i:i + MEDIA_GROUP_LIMIT] for i in range(0, len(items), MEDIA_GROUP_LIMIT)]
+    return groups
+
+async def _send_single(bot: Bot, chat_id, attachment, caption, reply_markup):
+    if attachment["kind"] == "photo":
+        return await bot.send_photo(chat_id, attachment["file_id"], caption=caption, reply_markup=reply_markup)
+    if attachment["kind"] == "video":
+        return await bot.send_video(chat_id, attachment["file_id"], caption=caption, reply_markup=reply_markup)
+    return await bot.send_document(chat_id, attachment["file_id"], caption=caption, reply_markup=reply_markup)
+
+async def send_ticket_card(bot: Bot, chat_id, ticket_id, attachments, text, reply_markup=None):
+    unknown = [a for a in attachments if a["kind"] not in INPUT_MEDIA]
+    if unknown:
+        logger.warning(f"Ticket #{ticket_id} has attachments of unknown type: {[a['kind'] for a in unknown]}")
+        attachments = [a for a in attachments if a["kind"] in INPUT_MEDIA]
+
+    anchor = media_cache.get(ticket_id, chat_id)
+    if anchor or not attachments:
+        reply = ReplyParameters(message_id=anchor, allow_sending_without_reply=True) if anchor else None
+        return await bot.send_message(chat_id, text, reply_markup=reply_markup, reply_parameters=reply)
+
+    if len(attachments) == 1:
+        message = await _send_single(bot, chat_id, attachments[0], text, reply_markup)
+        media_cache.put(ticket_id, chat_id, message.message_id)
+        return message
+
+    first_id = None
+    for group in _media_groups(attachments):
+        if len(group) == 1:
+            sent = [await _send_single(bot, chat_id, group[0], None, None)]
+        else:
+            sent = await bot.send_media_group(chat_id, [INPUT_MEDIA[a["kind"]](media=a["file_id"]) for a in group])
+        first_id = first_id or sent[0].message_id
+    media_cache.put(ticket_id, chat_id, first_id)
+    return await bot.send_message(
+        chat_id, text, reply_markup=reply_markup,
+        reply_parameters=ReplyParameters(message_id=first_id, allow_sending_without_reply=True)
+    )
+
+class MediaCache:
+    def __init__(self, size):
+        self.size = size
+        self._tickets = OrderedDict()
+
+    def get(self, ticket_id, chat_id):
+        sent = self._tickets.get(ticket_id)
+        if sent is None:
+            return None
+        self._tickets.move_to_end(ticket_id)
+        return sent.get(chat_id)
+
+    def put(self, ticket_id, chat_id, message_id):
+        self._tickets.setdefault(ticket_id, {})[chat_id] = message_id
+        self._tickets.move_to_end(ticket_id)
+        while len(self._tickets) > self.size:
+            self._tickets.popitem(last=False)
+
+    def invalidate(self, ticket_id):
+        self._tickets.pop(ticket_id, None)
+
+class MediaGroupCollector:
+    def __init__(self, delay):
+        self.delay = delay
+        self._groups = {}
+
+    async def collect(self, key, item):
+        group = self._groups.get(key)
+        if group is not None:
+            group["items"].append(item)
+            group["event"].set()
+            return None
+
+        group = {"items": [item], "event": asyncio.Event()}
+        self._groups[key] = group
+        try:
+            while True:
+                group["event"].clear()
+                try:
+                    await asyncio.wait_for(group["event"].wait(), self.delay)
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            self._groups.pop(key, None)
+        return group["items"]
+
+media_cache = MediaCache(MEDIA_CACHE_SIZE)
+media_groups = MediaGroupCollector(MEDIA_GROUP_DEBOUNCE)
\ No newline at end of file
@@ -1,43 +1,136 @@
 import asyncio
+import gzip
 import logging
 import os
-from datetime import datetime
-from bson import json_util
+import shutil
+from datetime import datetime, timedelta
+from bson import ObjectId, json_util
 from aiogram import Bot
 from aiogram.types import FSInputFile
-from app.db.database import client
-from app.utils.health_check import get_super_admin_id
+
+from config import BACKUP_DIR, BACKUP_BATCH_SIZE, BACKUP_PART_LIMIT, BACKUP_FULL_EVERY_DAYS, BACKUP_KEEP_FULL
+from app.db.database import db, get_super_admin_id
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = "backup"
+SKIP_COLLECTIONS = {"fsm_states", "backup_state", "ticket_stats", "updates"}
+
+class PartWriter:
+    def __init__(self, directory, name, limit):
+        self.directory = directory
+        self.name = name
+        self.limit = limit
+        self.part = 0
+        self.paths = []
+        self._raw = None
+        self._gz = None
+
+    def _open(self):
+        self.part += 1
+        path = os.path.join(self.directory, f"{self.name}.{self.part:03d}.ndjson.gz")
+        self._raw = open(path, "wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self.paths.append(path)
+
+    def write(self, chunk: bytes):
+        if self._gz is None or self._raw.tell() + len(chunk) > self.limit:
+            self.close()
+            self._open()
+        self._gz.write(chunk)
+
+    def close(self):
+        if self._gz is not None:
+            self._gz.close()
+            self._raw.close()
+            self._gz = self._raw = None
+
+def incremental_filter(since):
+    if since is None:
+        return {}
+    return {"$or": [{"_id": {"$gt": ObjectId.from_datetime(since)}}, {"updated_at": {"$gt": since}}]}
+
+async def dump_collection(coll_name, directory, since=None):
+    writer = PartWriter(directory, coll_name, BACKUP_PART_LIMIT)
+    count = 0
+    batch = []
+    try:
+        async for doc in db[coll_name].find(incremental_filter(since)).batch_size(BACKUP_BATCH_SIZE):
+            batch.append(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS))
+            if len(batch) >= BACKUP_BATCH_SIZE:
+                await asyncio.to_thread(writer.write, ("\n".join(batch) + "\n").encode("utf-8"))
+                count += len(batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(writer.write, ("\n".join(batch) + "\n").encode("utf-8"))
+            count += len(batch)
+    finally:
+        await asyncio.to_thread(writer.close)
+    return count, writer.paths
+
+def prune_backups(directory, keep_full):
+    names = sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+    fulls = [name for name in names if name.endswith("_full")]
+    if len(fulls) <= keep_full:
+        return []
+    oldest_kept = fulls[-keep_full]
+    removed = [name for name in names if name < oldest_kept]
+    for name in removed:
+        shutil.rmtree(os.path.join(directory, name))
+    return removed
+
+async def run_backup(full=False):
+    state = await db["backup_state"].find_one({"_id": STATE_ID}) or {}
+    started_at = datetime.utcnow()
+    last_full = state.get("last_full")
+    if not full and (not last_full or started_at - last_full >= timedelta(days=BACKUP_FULL_EVERY_DAYS)):
+        full = True
+    since = None if full else state.get("last_run")
+
+    kind = "full" if full else "incr"
+    directory = os.path.join(BACKUP_DIR, f"{started_at:%Y-%m-%d_%H%M%S}_{kind}")
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+
+    manifest = {"kind": kind, "since": since, "created_at": started_at, "collections": {}}
+    paths = []
+    for coll_name in await db.list_collection_names():
+        if coll_name in SKIP_COLLECTIONS or coll_name.startswith("system."):
+            continue
+        count, coll_paths = await dump_collection(coll_name, directory, since)
+        manifest["collections"][coll_name] = count
+        paths += coll_paths
+
+    manifest_path = os.path.join(directory, "manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        f.write(json_util.dumps(manifest, indent=2))
+
+    update = {"last_run": started_at}
+    if full:
+        update["last_full"] = started_at
+    await db["backup_state"].update_one({"_id": STATE_ID}, {"$set": update}, upsert=True)
+
+    logger.info(f"{kind} backup written to {directory}: {manifest['collections']}")
+    removed = await asyncio.to_thread(prune_backups, BACKUP_DIR, BACKUP_KEEP_FULL)
+    if removed:
+        logger.info(f"Pruned old backups: {', '.join(removed)}")
+    return manifest, [manifest_path] + paths
+
+async def send_backup(bot: Bot, admin_id, manifest, paths):
+    title = "Повний" if manifest["kind"] == "full" else "Інкрементальний"
+    total = sum(manifest["collections"].values())
+    for i, path in enumerate(paths, 1):
+        await bot.send_document(
+            admin_id,
+            FSInputFile(path),
+            caption=f"📦 {title} бекап бази даних ({manifest['created_at']:%d.%m.%Y}), файл {i}/{len(paths)}, документів: {total}"
+        )
 
 async def create_db_backup(bot: Bot):
-    while True:
-        await asyncio.sleep(60 * 60 * 24 * 7)
-        try:
-            admin_id = await get_super_admin_id()
-            if not admin_id:
-                continue
-
-            backup_data = {}
-            db = client.get_database()
-            collections = await db.list_collection_names()
-            
-            for coll_name in collections:
-                cursor = db[coll_name].find()
-                items = await cursor.to_list(length=None)
-                backup_data[coll_name] = items
-
-            if not os.path.exists('backups'):
-                os.makedirs('backups')
-                
-            file_path = f"backups/backup_{datetime.now().strftime('%Y-%m-%d')}.json"
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(json_util.dumps(backup_data, indent=4, ensure_ascii=False))
-
-            await bot.send_document(
-                admin_id, 
-                FSInputFile(file_path), 
-                caption=f"📦 Щотижневий бекап бази даних ({datetime.now().strftime('%d.%m.%Y')})"
-            )
-            logging.info(f"Backup sent to admin: {file_path}")
-        except Exception as e:
-            logging.error(f"Backup error: {e}")
\ No newline at end of file
+    admin_id = await get_super_admin_id()
+    if not admin_id:
+        logger.warning("Backup skipped: no super admin to send it to")
+        return
+
+    manifest, paths = await run_backup()
+    await send_backup(bot, admin_id, manifest, paths)
+    logger.info(f"Backup sent to admin: {len(paths)} files")
\ No newline at end of file
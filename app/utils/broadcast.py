@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+
+from pymongo import ReturnDocument
+
+from config import BROADCAST_RATE, BROADCAST_WORKERS, BROADCAST_BATCH_SIZE, BROADCAST_STALE_AFTER
+from app.db.database import users_collection, broadcasts_collection, is_super_admin
+from app.keyboards.support_keyboards import support_main_menu, super_admin_main_menu
+from app.utils.rate_limit import TokenBucket
+from app.utils.send_queue import send_priority, BULK
+from app.utils.scheduler import INSTANCE_ID
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 3
+MAX_RETRIES = 3
+
+limiter = TokenBucket(BROADCAST_RATE)
+_tasks = {}
+
+async def send_content(bot: Bot, chat_id, content_type, content_id, text):
+    if content_type == 'photo':
+        return await bot.send_photo(chat_id=chat_id, photo=content_id, caption=text)
+    elif content_type == 'video':
+        return await bot.send_video(chat_id=chat_id, video=content_id, caption=text)
+    elif content_type == 'document':
+        return await bot.send_document(chat_id=chat_id, document=content_id, caption=text)
+    return await bot.send_message(chat_id=chat_id, text=text)
+
+async def _deliver(bot: Bot, job, chat_id):
+    for _ in range(MAX_RETRIES):
+        await limiter.acquire()
+        try:
+            await send_content(bot, chat_id, job["content_type"], job["content_id"], job["text"])
+            return True
+        except TelegramRetryAfter as e:
+            logger.warning(f"Broadcast {job['_id']} hit flood control, pausing {e.retry_after}s")
+            limiter.block(e.retry_after)
+        except (TelegramForbiddenError, TelegramBadRequest):
+            return False
+        except Exception as e:
+            logger.warning(f"Broadcast {job['_id']} failed for {chat_id}: {e}")
+            return False
+    return False
+
+def _format_progress(job, started_at, sent_in_run):
+    done = job["sent"] + job["failed"]
+    elapsed = max(time.monotonic() - started_at, 1e-6)
+    speed = sent_in_run / elapsed
+    left = max(job["total"] - done, 0)
+    eta = int(left / speed) if speed > 0 else 0
+    return (
+        f"⏳ Розсилка триває: {done}/{job['total']}\n"
+        f"✅ Успішно: {job['sent']} | ❌ Помилок: {job['failed']}\n"
+        f"🚀 {speed:.1f} повід./с | ⌛ ~{eta // 60:02d}:{eta % 60:02d}"
+    )
+
+async def _report_progress(bot: Bot, job, text):
+    try:
+        await bot.edit_message_text(text, chat_id=job["status_chat_id"], message_id=job["status_message_id"])
+    except TelegramRetryAfter as e:
+        limiter.block(e.retry_after)
+    except Exception:
+        pass
+
+async def _finish(bot: Bot, job):
+    await broadcasts_collection.update_one(
+        {"_id": job["_id"]},
+        {"$set": {"status": "done", "recipients_count": job["sent"], "finished_at": datetime.utcnow()}}
+    )
+    try:
+        await bot.delete_message(job["status_chat_id"], job["status_message_id"])
+    except Exception:
+        pass
+
+    kb = super_admin_main_menu() if await is_super_admin(job["admin_id"]) else support_main_menu()
+    try:
+        await bot.send_message(
+            job["status_chat_id"],
+            f"✅ Розсилку завершено! Успішно: {job['sent']}, помилок: {job['failed']}",
+            reply_markup=kb
+        )
+    except Exception as e:
+        logger.error(f"Failed to report broadcast {job['_id']} result: {e}")
+
+async def _run(bot: Bot, job):
+    send_priority.set(BULK)
+    started_at = time.monotonic()
+    last_report = 0.0
+    sent_in_run = 0
+    semaphore = asyncio.Semaphore(BROADCAST_WORKERS)
+
+    async def deliver(chat_id):
+        async with semaphore:
+            return await _deliver(bot, job, chat_id)
+
+    query = {"_id": {"$gt": job["last_user_id"]}} if job.get("last_user_id") else {}
+    cursor = users_collection.find(query, {"telegram_id": 1}).sort("_id", 1).batch_size(BROADCAST_BATCH_SIZE)
+
+    try:
+        batch = []
+        async for user in cursor:
+            batch.append(user)
+            if len(batch) < BROADCAST_BATCH_SIZE:
+                continue
+            sent_in_run += await _process_batch(job, batch, deliver)
+            batch = []
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                await _report_progress(bot, job, _format_progress(job, started_at, sent_in_run))
+        if batch:
+            await _process_batch(job, batch, deliver)
+        await _finish(bot, job)
+        logger.info(f"Broadcast {job['_id']} finished: {job['sent']} sent, {job['failed']} failed")
+    except asyncio.CancelledError:
+        logger.info(f"Broadcast {job['_id']} paused at {job.get('last_user_id')}")
+        try:
+            await broadcasts_collection.update_one(
+                {"_id": job["_id"], "owner": INSTANCE_ID},
+                {"$set": {"owner": None, "heartbeat_at": None}}
+            )
+        except Exception:
+            pass
+        raise
+    except Exception as e:
+        logger.error(f"Broadcast {job['_id']} crashed: {e}")
+    finally:
+        _tasks.pop(job["_id"], None)
+
+async def _process_batch(job, batch, deliver):
+    results = await asyncio.gather(*(deliver(user["telegram_id"]) for user in batch))
+    ok = sum(results)
+    job["sent"] += ok
+    job["failed"] += len(results) - ok
+    job["last_user_id"] = batch[-1]["_id"]
+    await broadcasts_collection.update_one(
+        {"_id": job["_id"]},
+        {"$set": {
+            "sent": job["sent"],
+            "failed": job["failed"],
+            "last_user_id": job["last_user_id"],
+            "heartbeat_at": datetime.utcnow()
+        }}
+    )
+    return len(results)
+
+def _spawn(bot: Bot, job):
+    if job["_id"] not in _tasks:
+        _tasks[job["_id"]] = asyncio.create_task(_run(bot, job))
+
+async def start_broadcast(bot: Bot, admin_id, content_type, content_id, text, status_message):
+    job = {
+        "admin_id": admin_id,
+        "content_type": content_type,
+        "content_id": content_id,
+        "text": text,
+        "status": "running",
+        "total": await users_collection.estimated_document_count(),
+        "sent": 0,
+        "failed": 0,
+        "last_user_id": None,
+        "status_chat_id": status_message.chat.id,
+        "status_message_id": status_message.message_id,
+        "owner": INSTANCE_ID,
+        "heartbeat_at": datetime.utcnow(),
+        "date": datetime.utcnow()
+    }
+    result = await broadcasts_collection.insert_one(job)
+    job["_id"] = result.inserted_id
+    _spawn(bot, job)
+    return job["_id"]
+
+async def resume_broadcasts(bot: Bot):
+    stale = datetime.utcnow() - timedelta(seconds=BROADCAST_STALE_AFTER)
+    while True:
+        job = await broadcasts_collection.find_one_and_update(
+            {
+                "status": "running",
+                "_id": {"$nin": list(_tasks)},
+                "$or": [{"heartbeat_at": None}, {"heartbeat_at": {"$lt": stale}}]
+            },
+            {"$set": {"owner": INSTANCE_ID, "heartbeat_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if job is None:
+            return
+        logger.info(f"Resuming broadcast {job['_id']} after {job['sent'] + job['failed']} recipients")
+        _spawn(bot, job)
+
+async def stop_broadcasts():
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
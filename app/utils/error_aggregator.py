@@ -0,0 +1,100 @@
+import hashlib
+import os
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+from config import ERROR_ALERT_INTERVAL, ERROR_WINDOW, ERROR_BUFFER_SIZE
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _location(exc):
+    frames = traceback.extract_tb(exc.__traceback__)
+    own = [f for f in frames if f.filename.startswith(PROJECT_ROOT) and "site-packages" not in f.filename]
+    frame = (own or frames or [None])[-1]
+    if frame is None:
+        return "unknown"
+    return f"{os.path.relpath(frame.filename, PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+
+def fingerprint(exc):
+    location = _location(exc)
+    digest = hashlib.sha1(f"{type(exc).__name__}|{location}".encode()).hexdigest()[:10]
+    return digest, location
+
+class ErrorGroup:
+    def __init__(self, key, error_type, location):
+        self.key = key
+        self.error_type = error_type
+        self.location = location
+        self.message = ""
+        self.seen = deque()
+        self.total = 0
+        self.pending = 0
+        self.last_alert = None
+
+    def window_count(self, now):
+        while self.seen and now - self.seen[0] > ERROR_WINDOW:
+            self.seen.popleft()
+        return len(self.seen)
+
+class ErrorAggregator:
+    def __init__(self, interval=ERROR_ALERT_INTERVAL, buffer_size=ERROR_BUFFER_SIZE):
+        self.interval = interval
+        self.groups = {}
+        self.recent = deque(maxlen=buffer_size)
+
+    def record(self, exc, update_id=None, user_id=None):
+        key, location = fingerprint(exc)
+        now = time.monotonic()
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = ErrorGroup(key, type(exc).__name__, location)
+        group.message = str(exc)
+        group.seen.append(now)
+        group.total += 1
+        group.pending += 1
+        self.recent.append({
+            "at": datetime.utcnow(),
+            "key": key,
+            "type": group.error_type,
+            "message": group.message,
+            "location": location,
+            "update_id": update_id,
+            "user_id": user_id
+        })
+
+        if group.last_alert is None or now - group.last_alert >= self.interval:
+            return self._take(group, now)
+        return None
+
+    def _take(self, group, now):
+        summary = {
+            "key": group.key,
+            "type": group.error_type,
+            "location": group.location,
+            "message": group.message,
+            "count": group.pending,
+            "window_count": group.window_count(now),
+            "first": group.last_alert is None
+        }
+        group.pending = 0
+        group.last_alert = now
+        return summary
+
+    def due(self):
+        now = time.monotonic()
+        summaries = [
+            self._take(group, now) for group in self.groups.values()
+            if group.pending and now - group.last_alert >= self.interval
+        ]
+        for key in [key for key, group in self.groups.items() if not group.pending and not group.window_count(now)]:
+            del self.groups[key]
+        return summaries
+
+    def top(self, limit=10):
+        now = time.monotonic()
+        groups = [(group, group.window_count(now)) for group in self.groups.values()]
+        return sorted(groups, key=lambda item: item[1], reverse=True)[:limit]
+
+error_aggregator = ErrorAggregator()
\ No newline at end of file
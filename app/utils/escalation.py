@@ -0,0 +1,57 @@
+import logging
+from datetime import datetime, timedelta
+from aiogram import Bot
+
+from config import SLA_THRESHOLDS
+from app.db.database import tickets_collection, get_support_ids, get_super_admin_id
+from app.db.ticket_states import PENDING
+from app.keyboards.support_keyboards import support_accept_kb
+from app.utils.notifier import fan_out
+from app.utils.live_cards import record_notifications
+
+logger = logging.getLogger(__name__)
+
+def escalation_query(priority, level, threshold, now):
+    return {
+        "status": PENDING,
+        "priority": priority,
+        "created_at": {"$lte": now - timedelta(minutes=threshold)},
+        "escalation_level": {"$not": {"$gte": level}}
+    }
+
+async def _claim(ticket_id, level, now):
+    return await tickets_collection.find_one_and_update(
+        {"ticket_id": ticket_id, "status": PENDING, "escalation_level": {"$not": {"$gte": level}}},
+        {"$set": {"escalation_level": level, "escalated_at": now, "updated_at": now}}
+    )
+
+async def _escalate(bot: Bot, ticket, level, is_final, now):
+    waited = int((now - ticket["created_at"]).total_seconds() // 60)
+    text = (
+        f"⏰ <b>SLA: заявка #{ticket['ticket_id']} без відповіді {waited} хв</b>\n"
+        f"👤 {ticket['name']} | 📞 {ticket['phone']}\n"
+        f"📄 {ticket['description']}\n"
+        f"⚙️ Пріоритет: {ticket['priority']} | рівень ескалації: {level}"
+    )
+    if is_final:
+        super_admin_id = await get_super_admin_id()
+        recipients = [super_admin_id] if super_admin_id else await get_support_ids()
+    else:
+        recipients = await get_support_ids()
+
+    kb = support_accept_kb(ticket["ticket_id"])
+    results = await fan_out(recipients, lambda chat_id: bot.send_message(chat_id, text, reply_markup=kb))
+    await record_notifications(ticket["ticket_id"], [r.message for r in results if r.ok])
+
+async def check_sla(bot: Bot):
+    now = datetime.utcnow()
+    escalated = 0
+    for priority, thresholds in SLA_THRESHOLDS.items():
+        for level in range(len(thresholds), 0, -1):
+            query = escalation_query(priority, level, thresholds[level - 1], now)
+            async for ticket in tickets_collection.find(query, {"_id": 0}).sort("created_at", 1):
+                if await _claim(ticket["ticket_id"], level, now):
+                    await _escalate(bot, ticket, level, level == len(thresholds), now)
+                    escalated += 1
+    if escalated:
+        logger.warning(f"SLA: escalated {escalated} tickets")
\ No newline at end of file
@@ -0,0 +1,109 @@
+import asyncio
+import html
+import logging
+from collections import defaultdict
+from datetime import datetime
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from pymongo.errors import OperationFailure
+
+from config import LIVE_CARDS_POLL_INTERVAL
+from app.db.database import tickets_collection
+from app.db.ticket_states import PENDING, ACCEPTED, COMPLETED, REJECTED, CANCELLED
+from app.keyboards.support_keyboards import support_accept_kb, support_work_kb
+from app.utils.notifier import fan_out
+
+logger = logging.getLogger(__name__)
+
+CHANGE_STREAM_UNSUPPORTED = 40573
+STATUS_PIPELINE = [{"$match": {
+    "operationType": "update",
+    "updateDescription.updatedFields.status": {"$exists": True}
+}}]
+
+_resume_token = None
+
+def render_card(ticket, chat_id=None):
+    ticket_id = ticket["ticket_id"]
+    details = (
+        f"👤 {ticket['name']} | 📞 {ticket['phone']}\n"
+        f"📄 {ticket['description']}\n"
+    )
+    operator = f"@{ticket['accepted_by']}" if ticket.get("accepted_by") else None
+
+    if ticket["status"] == PENDING:
+        text = f"🆕 <b>Нова заявка #{ticket_id}</b>\n{details}⚙️ Пріоритет: {ticket['priority']}"
+        return text, support_accept_kb(ticket_id)
+    if ticket["status"] == ACCEPTED:
+        text = f"<b>Заявка #{ticket_id} (В роботі)</b>\n{details}👨‍💻 <b>Прийняв:</b> {operator}"
+        return text, support_work_kb(ticket_id) if chat_id == ticket.get("accepted_by_id") else None
+    if ticket["status"] == COMPLETED:
+        return f"✅ Заявка #{ticket_id} завершена." + (f"\n👨‍💻 {operator}" if operator else ""), None
+    if ticket["status"] == REJECTED:
+        return f"❌ Заявку #{ticket_id} відхилено.\nПричина: {html.escape(ticket.get('decline_reason') or '—')}", None
+    if ticket["status"] == CANCELLED:
+        return f"🚫 Заявку #{ticket_id} скасовано користувачем.", None
+    return f"<b>Заявка #{ticket_id} ({ticket['status']})</b>\n{details}", None
+
+async def record_notifications(ticket_id, messages):
+    notes = [
+        {"chat_id": m.chat.id, "message_id": m.message_id, "caption": m.caption is not None}
+        for m in messages if m is not None
+    ]
+    if notes:
+        await tickets_collection.update_one({"ticket_id": ticket_id}, {
+            "$push": {"notifications": {"$each": notes}},
+            "$set": {"updated_at": datetime.utcnow()}
+        })
+
+async def edit_card(bot: Bot, note, text, kb):
+    try:
+        if note.get("caption"):
+            await bot.edit_message_caption(chat_id=note["chat_id"], message_id=note["message_id"], caption=text, reply_markup=kb)
+        else:
+            await bot.edit_message_text(text, chat_id=note["chat_id"], message_id=note["message_id"], reply_markup=kb)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            raise
+
+async def refresh_cards(bot: Bot, ticket):
+    by_chat = defaultdict(list)
+    for note in ticket.get("notifications", []):
+        by_chat[note["chat_id"]].append(note)
+    if not by_chat:
+        return
+
+    async def edit(chat_id):
+        text, kb = render_card(ticket, chat_id)
+        for note in by_chat[chat_id]:
+            await edit_card(bot, note, text, kb)
+
+    await fan_out(list(by_chat), edit)
+
+async def _watch_stream(bot: Bot):
+    global _resume_token
+    async with await tickets_collection.watch(STATUS_PIPELINE, full_document="updateLookup", resume_after=_resume_token) as stream:
+        logger.info("Live ticket cards: watching change stream")
+        async for change in stream:
+            _resume_token = stream.resume_token
+            if change.get("fullDocument"):
+                await refresh_cards(bot, change["fullDocument"])
+
+async def _poll(bot: Bot):
+    since = datetime.utcnow()
+    logger.info(f"Live ticket cards: polling every {LIVE_CARDS_POLL_INTERVAL}s")
+    while True:
+        await asyncio.sleep(LIVE_CARDS_POLL_INTERVAL)
+        query = {"updated_at": {"$gt": since}, "notifications.0": {"$exists": True}}
+        async for ticket in tickets_collection.find(query).sort("updated_at", 1):
+            since = ticket["updated_at"]
+            await refresh_cards(bot, ticket)
+
+async def watch_tickets(bot: Bot):
+    try:
+        await _watch_stream(bot)
+    except OperationFailure as e:
+        if e.code != CHANGE_STREAM_UNSUPPORTED:
+            raise
+        logger.warning("Change streams are not supported by this MongoDB deployment")
+        await _poll(bot)
\ No newline at end of file
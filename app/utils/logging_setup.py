@@ -0,0 +1,116 @@
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+from config import LOG_DIR, LOG_LEVEL, LOG_RETENTION_DAYS, LOG_CONSOLE_FORMAT, LOG_SAMPLE_RATE, LOG_SAMPLED_LOGGERS
+
+CONTEXT_FIELDS = ("update_id", "user_id", "handler", "duration")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+PHONE_RE = re.compile(
+    r"(?<![\w+\-])(?:"
+    r"\+\d(?:[\s\-()]*\d){8,14}"
+    r"|0\d{2}(?:[\s\-()]*\d){7}"
+    r"|\d{11,15}"
+    r")(?!\d)"
+)
+
+_log_context: ContextVar[dict] = ContextVar("log_context", default={})
+
+def set_log_context(**fields):
+    return _log_context.set(fields)
+
+def bind_log_context(**fields):
+    _log_context.set({**_log_context.get(), **fields})
+
+def reset_log_context(token):
+    _log_context.reset(token)
+
+def mask_phones(text):
+    return PHONE_RE.sub(lambda m: "***" + re.sub(r"\D", "", m.group(0))[-2:], text)
+
+class ContextFilter(logging.Filter):
+    def filter(self, record):
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+class PIIFilter(logging.Filter):
+    def filter(self, record):
+        message = record.getMessage()
+        masked = mask_phones(message)
+        if masked != message:
+            record.msg, record.args = masked, None
+        return True
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate, prefixes):
+        super().__init__()
+        self.rate = rate
+        self.prefixes = tuple(prefixes)
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno != logging.INFO or not record.name.startswith(self.prefixes):
+            return True
+        return random.random() < self.rate
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+_exception_formatter = logging.Formatter()
+
+class StructuredQueueHandler(QueueHandler):
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = mask_phones(_exception_formatter.formatException(record.exc_info))
+        record.exc_info = None
+        return record
+
+def setup_logging():
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    file_handler = TimedRotatingFileHandler(
+        os.path.join(LOG_DIR, "bot.log"), when="midnight", backupCount=LOG_RETENTION_DAYS, encoding="utf-8", utc=True
+    )
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(JsonFormatter() if LOG_CONSOLE_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    queue_handler = StructuredQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE, LOG_SAMPLED_LOGGERS))
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(PIIFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    listener = QueueListener(queue_handler.queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    return listener
\ No newline at end of file
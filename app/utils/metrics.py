@@ -0,0 +1,105 @@
+import threading
+from contextvars import ContextVar
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_metrics = []
+_collectors = []
+_update_mongo_calls: ContextVar[list | None] = ContextVar("update_mongo_calls", default=None)
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            counts, total, observed = self._values.get(labels, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[labels] = (counts, total + value, observed + 1)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, observed) in sorted(self._values.items()):
+            names = self.labelnames + ("le",)
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, labels + ('+Inf',))} {observed}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {observed}")
+        return lines
+
+def add_collector(collector):
+    _collectors.append(collector)
+
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines += metric.render()
+    for collector in _collectors:
+        lines += collector()
+    return "\n".join(lines) + "\n"
+
+updates_total = Counter("bot_updates_total", "Updates processed by the dispatcher", ["type"])
+update_duration = Histogram("bot_update_duration_seconds", "Time to process one update end to end", ["type"])
+update_mongo_calls = Histogram("bot_update_mongo_calls", "MongoDB commands issued per update", buckets=(0, 1, 2, 3, 5, 8, 13, 21))
+handler_duration = Histogram("bot_handler_duration_seconds", "Handler latency", ["handler"])
+handler_errors = Counter("bot_handler_errors_total", "Exceptions raised by handlers", ["handler"])
+mongo_duration = Histogram("mongo_command_duration_seconds", "MongoDB command latency", ["command"])
+mongo_failures = Counter("mongo_command_failures_total", "Failed MongoDB commands", ["command"])
+telegram_duration = Histogram("telegram_api_duration_seconds", "Telegram Bot API call latency", ["method"])
+telegram_errors = Counter("telegram_api_errors_total", "Failed Telegram Bot API calls", ["method", "error"])
+
+def start_update_tracking():
+    return _update_mongo_calls.set([0])
+
+def finish_update_tracking(token):
+    calls = _update_mongo_calls.get()
+    _update_mongo_calls.reset(token)
+    return calls[0] if calls else 0
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        calls = _update_mongo_calls.get()
+        if calls is not None:
+            calls[0] += 1
+
+    def succeeded(self, event):
+        mongo_duration.observe(event.duration_micros / 1_000_000, event.command_name)
+
+    def failed(self, event):
+        mongo_duration.observe(event.duration_micros / 1_000_000, event.command_name)
+        mongo_failures.inc(event.command_name)
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from typing import Any, NamedTuple
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+
+from config import NOTIFY_CONCURRENCY, NOTIFY_RETRIES
+from app.db.database import get_support_ids
+from app.utils.send_queue import send_priority, STAFF
+
+logger = logging.getLogger(__name__)
+
+class DeliveryResult(NamedTuple):
+    chat_id: int
+    ok: bool
+    message: Any = None
+    error: str | None = None
+
+async def _deliver(chat_id, send, semaphore, retries):
+    send_priority.set(STAFF)
+    backoff = 0.5
+    error = None
+    for attempt in range(retries):
+        try:
+            async with semaphore:
+                return DeliveryResult(chat_id, True, await send(chat_id))
+        except TelegramRetryAfter as e:
+            error = str(e)
+            await asyncio.sleep(e.retry_after)
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            return DeliveryResult(chat_id, False, error=str(e))
+        except Exception as e:
+            error = str(e)
+            if attempt + 1 < retries:
+                await asyncio.sleep(backoff)
+                backoff *= 2
+    return DeliveryResult(chat_id, False, error=error)
+
+async def fan_out(chat_ids, send, concurrency=NOTIFY_CONCURRENCY, retries=NOTIFY_RETRIES):
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*(_deliver(chat_id, send, semaphore, retries) for chat_id in chat_ids))
+    for result in results:
+        if not result.ok:
+            logger.error(f"Failed to notify {result.chat_id}: {result.error}")
+    return results
+
+async def notify_support(send):
+    return await fan_out(await get_support_ids(), send)
\ No newline at end of file
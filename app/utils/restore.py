@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import glob
+import gzip
+import logging
+import os
+from collections import defaultdict
+from bson import json_util
+from pymongo import ReplaceOne, DeleteOne
+
+from app.db.database import db, close_db
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+def read_manifest(directory):
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        return json_util.loads(f.read())
+
+async def restore_file(path, coll_name):
+    restored = 0
+    ops = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            doc = json_util.loads(line)
+            ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+            if len(ops) >= BATCH_SIZE:
+                await db[coll_name].bulk_write(ops, ordered=False)
+                restored += len(ops)
+                ops = []
+    if ops:
+        await db[coll_name].bulk_write(ops, ordered=False)
+        restored += len(ops)
+    return restored
+
+async def apply_deletions(directory):
+    ops = defaultdict(list)
+    for path in sorted(glob.glob(os.path.join(directory, "deletions.*.ndjson.gz"))):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    tombstone = json_util.loads(line)
+                    ops[tombstone["collection"]].append(DeleteOne({"_id": tombstone["doc_id"]}))
+    for coll_name, coll_ops in ops.items():
+        result = await db[coll_name].bulk_write(coll_ops, ordered=False)
+        logger.info(f"  {coll_name}: {result.deleted_count} documents deleted")
+
+async def restore(directories, drop=False):
+    for directory in directories:
+        manifest = read_manifest(directory)
+        logger.info(f"Restoring {manifest['kind']} backup from {directory}")
+
+        for coll_name in manifest["collections"]:
+            if drop and manifest["kind"] == "full":
+                await db[coll_name].drop()
+            restored = 0
+            for path in sorted(glob.glob(os.path.join(directory, f"{coll_name}.*.ndjson.gz"))):
+                restored += await restore_file(path, coll_name)
+            logger.info(f"  {coll_name}: {restored} documents")
+        await apply_deletions(directory)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Restore backups made by app.utils.backup")
+    parser.add_argument("directories", nargs="+", help="Backup directories: a full backup followed by incrementals, oldest first")
+    parser.add_argument("--drop", action="store_true", help="Drop collections before applying a full backup")
+    args = parser.parse_args()
+
+    try:
+        await restore(args.directories, args.drop)
+    finally:
+        await close_db()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.db.database import jobs_collection
+from app.utils.send_queue import send_priority, STAFF
+
+logger = logging.getLogger(__name__)
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+def _parse_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = map(int, part.split("-"))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field '{field}' is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronSchedule:
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = {day % 7 for day in _parse_field(fields[4], 0, 7)}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, dt):
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 4)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+
+class Job:
+    def __init__(self, name, func, interval=None, cron=None, jitter=0, lease=300, distributed=True):
+        if (interval is None) == (cron is None):
+            raise ValueError("Job needs exactly one of interval or cron")
+        self.name = name
+        self.func = func
+        self.interval = timedelta(seconds=interval) if interval is not None else None
+        self.cron = CronSchedule(cron) if cron else None
+        self.jitter = jitter
+        self.lease = lease
+        self.distributed = distributed
+        self.last_run = None
+
+    def next_run(self, last_run, now):
+        if not last_run:
+            return self.cron.next_after(now) if self.cron else now
+        slot = self.cron.next_after(last_run) if self.cron else last_run + self.interval
+        return max(slot, now)
+
+class Scheduler:
+    def __init__(self, collection=jobs_collection, instance_id=INSTANCE_ID):
+        self.collection = collection
+        self.instance_id = instance_id
+        self.jobs = {}
+        self._tasks = {}
+
+    def add_job(self, name, func, **kwargs):
+        self.jobs[name] = Job(name, func, **kwargs)
+        return self.jobs[name]
+
+    async def _last_run(self, job):
+        if not job.distributed:
+            return job.last_run
+        state = await self.collection.find_one({"_id": job.name}, {"last_run": 1})
+        return state.get("last_run") if state else None
+
+    async def _acquire(self, job, now):
+        try:
+            state = await self.collection.find_one_and_update(
+                {"_id": job.name, "$or": [
+                    {"lease_until": {"$lt": now}},
+                    {"lease_until": None},
+                    {"lease_owner": self.instance_id}
+                ]},
+                {"$set": {"lease_owner": self.instance_id, "lease_until": now + timedelta(seconds=job.lease)}},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            return False, None
+        return True, (state or {}).get("last_run")
+
+    async def _release(self, job):
+        await self.collection.update_one(
+            {"_id": job.name, "lease_owner": self.instance_id},
+            {"$set": {"lease_until": None}}
+        )
+
+    async def _renew(self, job, task, lease_lost):
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(job.lease / 3)
+            try:
+                result = await self.collection.update_one(
+                    {"_id": job.name, "lease_owner": self.instance_id},
+                    {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=job.lease)}}
+                )
+            except Exception as e:
+                logger.warning(f"Failed to renew lease for job {job.name}: {e}")
+                if time.monotonic() - renewed_at < job.lease:
+                    continue
+                result = None
+
+            if result is not None and result.matched_count:
+                renewed_at = time.monotonic()
+                continue
+            logger.error(f"Lost lease for job {job.name}, cancelling the run")
+            lease_lost.set()
+            task.cancel()
+            return
+
+    async def _execute(self, job):
+        started = datetime.utcnow()
+        error = None
+        task = asyncio.create_task(job.func(), name=f"job:{job.name}:run")
+        lease_lost = asyncio.Event()
+        renewer = asyncio.create_task(self._renew(job, task, lease_lost)) if job.distributed else None
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Job {job.name} failed: {e}")
+        finally:
+            if renewer:
+                renewer.cancel()
+
+        if lease_lost.is_set():
+            return
+
+        job.last_run = started
+        if job.distributed:
+            await self.collection.update_one(
+                {"_id": job.name, "lease_owner": self.instance_id},
+                {"$set": {
+                    "last_run": started,
+                    "last_duration": (datetime.utcnow() - started).total_seconds(),
+                    "last_error": error,
+                    "lease_until": None
+                }}
+            )
+
+    async def _loop(self, job):
+        send_priority.set(STAFF)
+        while True:
+            try:
+                now = datetime.utcnow()
+                scheduled_at = job.next_run(await self._last_run(job), now)
+                delay = max((scheduled_at - now).total_seconds(), 0) + random.uniform(0, job.jitter)
+                await asyncio.sleep(delay)
+
+                if job.distributed:
+                    acquired, last_run = await self._acquire(job, datetime.utcnow())
+                    if not acquired:
+                        await asyncio.sleep(min(job.lease, 60))
+                        continue
+                    if last_run and job.next_run(last_run, scheduled_at) > scheduled_at:
+                        await self._release(job)
+                        continue
+                await self._execute(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler loop for {job.name} failed: {e}")
+                await asyncio.sleep(30)
+
+    def start(self):
+        for name, job in self.jobs.items():
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._loop(job), name=f"job:{name}")
+        logger.info(f"Scheduler started with jobs: {', '.join(self.jobs)}")
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        try:
+            await self.collection.update_many(
+                {"lease_owner": self.instance_id},
+                {"$set": {"lease_until": None}}
+            )
+        except Exception as e:
+            logger.warning(f"Failed to release job leases: {e}")
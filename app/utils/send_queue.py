@@ -0,0 +1,188 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText, EditMessageCaption, EditMessageReplyMarkup
+
+from config import SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_CHAT_BURST, SEND_WORKERS, SEND_RETRIES
+from app.utils import metrics
+from app.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE, STAFF, BULK = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", STAFF: "staff", BULK: "bulk"}
+QUEUED_PREFIXES = ("send", "edit", "copy", "forward")
+EDIT_METHODS = (EditMessageText, EditMessageCaption, EditMessageReplyMarkup)
+CHAT_BUCKETS_LIMIT = 10_000
+CHAT_IDLE_SECONDS = 60
+DRAIN_TIMEOUT = 5
+
+send_priority: ContextVar[int] = ContextVar("send_priority", default=INTERACTIVE)
+
+queued_total = metrics.Counter("telegram_send_queued_total", "Requests routed through the outbound queue", ["priority"])
+coalesced_total = metrics.Counter("telegram_send_coalesced_total", "Edits merged into an already queued edit of the same message")
+retry_after_total = metrics.Counter("telegram_send_retry_after_total", "Flood control responses handled by the outbound queue")
+queue_wait = metrics.Histogram("telegram_send_queue_wait_seconds", "Time a request spent in the outbound queue", ["priority"])
+
+def is_queued(method):
+    return method.__api_method__.startswith(QUEUED_PREFIXES)
+
+def _edit_key(method):
+    if not isinstance(method, EDIT_METHODS):
+        return None
+    if method.inline_message_id:
+        return method.__api_method__, method.inline_message_id
+    return method.__api_method__, method.chat_id, method.message_id
+
+class OutboundRequest:
+    def __init__(self, priority, make_request, bot, method, key):
+        self.priority = priority
+        self.make_request = make_request
+        self.bot = bot
+        self.method = method
+        self.key = key
+        self.futures = []
+        self.attempts = 0
+        self.queued_at = time.monotonic()
+
+    def resolve(self, result=None, error=None):
+        for future in self.futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+class SendQueue:
+    def __init__(self, global_rate, chat_rate, chat_burst, workers, retries):
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.workers = workers
+        self.retries = retries
+        self._queue = None
+        self._seq = itertools.count()
+        self._chats = {}
+        self._edits = {}
+        self._tasks = []
+
+    def depth(self):
+        return self._queue.qsize() if self._queue else 0
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= CHAT_BUCKETS_LIMIT:
+                self._prune()
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _prune(self):
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items()
+                        if now - bucket.updated_at > CHAT_IDLE_SECONDS and bucket.blocked_until < now]:
+            del self._chats[chat_id]
+
+    def _put(self, request):
+        self._queue.put_nowait((request.priority, next(self._seq), request))
+
+    def _requeue_later(self, request, delay):
+        asyncio.get_running_loop().call_later(delay, self._put, request)
+
+    def _start(self):
+        if not self._tasks:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.create_task(self._worker(), name=f"send_queue:{i}") for i in range(self.workers)]
+
+    async def submit(self, make_request, bot, method):
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        key = _edit_key(method)
+
+        pending = self._edits.get(key) if key else None
+        if pending is not None:
+            pending.method = method
+            pending.futures.append(future)
+            coalesced_total.inc()
+            return await future
+
+        request = OutboundRequest(send_priority.get(), make_request, bot, method, key)
+        request.futures.append(future)
+        if key:
+            self._edits[key] = request
+        queued_total.inc(PRIORITY_NAMES[request.priority])
+        self._put(request)
+        return await future
+
+    async def _worker(self):
+        while True:
+            _, _, request = await self._queue.get()
+            try:
+                await self._process(request)
+            except Exception as e:
+                logger.error(f"Outbound queue worker failed on {request.method.__api_method__}: {e}")
+                request.resolve(error=e)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, request):
+        chat_id = getattr(request.method, "chat_id", None)
+        bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+        if bucket and bucket.delay() > 0:
+            self._requeue_later(request, bucket.delay())
+            return
+
+        await self.global_bucket.acquire()
+        if bucket and not bucket.try_acquire():
+            self._requeue_later(request, bucket.delay())
+            return
+
+        if request.key:
+            self._edits.pop(request.key, None)
+        queue_wait.observe(time.monotonic() - request.queued_at, PRIORITY_NAMES[request.priority])
+
+        try:
+            result = await request.make_request(request.bot, request.method)
+        except TelegramRetryAfter as e:
+            retry_after_total.inc()
+            (bucket or self.global_bucket).block(e.retry_after)
+            request.attempts += 1
+            if request.attempts > self.retries:
+                request.resolve(error=e)
+                return
+            logger.warning(f"Flood control on {request.method.__api_method__} for {chat_id}, retrying in {e.retry_after}s")
+            if request.key:
+                newer = self._edits.get(request.key)
+                if newer is not None:
+                    newer.futures += request.futures
+                    return
+                self._edits[request.key] = request
+            self._put(request)
+            return
+        except Exception as e:
+            request.resolve(error=e)
+            return
+        request.resolve(result)
+
+    async def close(self):
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Outbound queue closed with {self.depth()} requests pending")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+send_queue = SendQueue(SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_CHAT_BURST, SEND_WORKERS, SEND_RETRIES)
+
+metrics.add_collector(lambda: [
+    "# TYPE telegram_send_queue_depth gauge",
+    f"telegram_send_queue_depth {send_queue.depth()}",
+])
\ No newline at end of file
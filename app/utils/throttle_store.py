@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from app.utils.rate_limit import TokenBucket
+
+class MemoryBucketStore:
+    def __init__(self, max_size=100_000):
+        self.buckets = {}
+        self.max_size = max_size
+
+    def _evict_idle(self):
+        for key in [k for k, bucket in self.buckets.items() if bucket.delay(bucket.capacity) == 0]:
+            del self.buckets[key]
+
+    async def consume(self, key, rate, capacity):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_size:
+                self._evict_idle()
+            bucket = self.buckets[key] = TokenBucket(rate, capacity)
+        if bucket.try_acquire():
+            return 0.0
+        return bucket.delay()
+
+class MongoBucketStore:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def consume(self, key, rate, capacity):
+        now = datetime.utcnow()
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [rate, {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}]}
+        ]}]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": now + timedelta(seconds=capacity / rate)
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc["allowed"]:
+            return 0.0
+        return (1 - doc["tokens"]) / rate
\ No newline at end of file
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from pymongo import ReturnDocument, ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from config import SHARD_COUNT, SHARD_LEASE, WORKER_CONCURRENCY, WORKER_POLL_INTERVAL
+from app.db.database import updates_collection
+from app.utils import metrics
+from app.utils.scheduler import INSTANCE_ID
+from app.utils.send_queue import send_priority, INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+NEW, PROCESSING, DONE = "new", "processing", "done"
+RECOVER_INTERVAL = 5
+DRAIN_TIMEOUT = 5
+
+enqueued_total = metrics.Counter("bot_updates_enqueued_total", "Updates written to the shard queue", ["shard"])
+duplicates_total = metrics.Counter("bot_updates_duplicate_total", "Redelivered updates dropped by the shard queue")
+consumed_total = metrics.Counter("bot_updates_consumed_total", "Updates processed from the shard queue", ["shard", "result"])
+
+def shard_for(key, shard_count=SHARD_COUNT):
+    return key % shard_count
+
+class UpdateQueue:
+    def __init__(self, collection=updates_collection, shard_count=SHARD_COUNT):
+        self.collection = collection
+        self.shard_count = shard_count
+
+    async def push(self, update: Update, key):
+        shard = shard_for(key, self.shard_count)
+        try:
+            await self.collection.insert_one({
+                "_id": update.update_id,
+                "shard": shard,
+                "key": key,
+                "media_group": update.message.media_group_id if update.message else None,
+                "status": NEW,
+                "payload": update.model_dump(mode="json", exclude_unset=True),
+                "created_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            duplicates_total.inc()
+            return False
+        enqueued_total.inc(shard)
+        return True
+
+    async def claim(self, shard, owner=INSTANCE_ID, busy_keys=(), open_groups=()):
+        query = {"shard": shard, "status": NEW}
+        if busy_keys:
+            query["$or"] = [{"key": {"$nin": list(busy_keys)}}, {"media_group": {"$in": list(open_groups)}}]
+        return await self.collection.find_one_and_update(
+            query,
+            {"$set": {"status": PROCESSING, "owner": owner, "claimed_at": datetime.utcnow()}},
+            sort=[("_id", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def complete(self, update_id, error=None, owner=INSTANCE_ID):
+        result = await self.collection.update_one(
+            {"_id": update_id, "status": PROCESSING, "owner": owner},
+            {"$set": {"status": DONE, "processed_at": datetime.utcnow(), "error": error}}
+        )
+        if not result.matched_count:
+            logger.warning(f"Update {update_id} was re-claimed by another owner before completion")
+
+    async def recover(self, shard, lease=SHARD_LEASE, exclude=()):
+        result = await self.collection.update_many(
+            {
+                "shard": shard,
+                "status": PROCESSING,
+                "claimed_at": {"$lt": datetime.utcnow() - timedelta(seconds=lease)},
+                "_id": {"$nin": list(exclude)}
+            },
+            {"$set": {"status": NEW}, "$unset": {"owner": "", "claimed_at": ""}}
+        )
+        if result.modified_count:
+            logger.warning(f"Shard {shard}: re-queued {result.modified_count} updates left by a previous owner")
+
+    async def foreign_keys(self, shard, exclude=()):
+        return set(await self.collection.distinct(
+            "key", {"shard": shard, "status": PROCESSING, "_id": {"$nin": list(exclude)}}
+        ))
+
+    async def pending(self):
+        return await self.collection.count_documents({"status": {"$ne": DONE}})
+
+update_queue = UpdateQueue()
+
+async def _process(dp: Dispatcher, bot: Bot, queue, doc, semaphore):
+    send_priority.set(INTERACTIVE)
+    error = None
+    try:
+        await dp.feed_update(bot, Update.model_validate(doc["payload"], context={"bot": bot}))
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Update {doc['_id']} failed on shard {doc['shard']}: {e}")
+    finally:
+        semaphore.release()
+    consumed_total.inc(doc["shard"], "error" if error else "ok")
+    await queue.complete(doc["_id"], error)
+
+async def consume_shard(dp: Dispatcher, bot: Bot, shard, queue=update_queue, concurrency=WORKER_CONCURRENCY, lease=SHARD_LEASE):
+    logger.info(f"Consuming shard {shard}/{queue.shard_count} as {INSTANCE_ID}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = {}
+    in_flight = {}
+    finished = asyncio.Event()
+    foreign_keys = set()
+    idle = 0.05
+    recovered_at = 0.0
+
+    def done(update_id):
+        tasks.pop(update_id, None)
+        in_flight.pop(update_id, None)
+        finished.set()
+
+    try:
+        while True:
+            if time.monotonic() - recovered_at >= RECOVER_INTERVAL:
+                await queue.recover(shard, lease, exclude=tasks)
+                foreign_keys = await queue.foreign_keys(shard, exclude=tasks)
+                recovered_at = time.monotonic()
+
+            await semaphore.acquire()
+            finished.clear()
+            busy_keys = foreign_keys | {doc["key"] for doc in in_flight.values()}
+            open_groups = {doc["media_group"] for doc in in_flight.values() if doc.get("media_group")}
+            doc = await queue.claim(shard, busy_keys=busy_keys, open_groups=open_groups)
+            if doc is None:
+                semaphore.release()
+                try:
+                    await asyncio.wait_for(finished.wait(), idle)
+                except asyncio.TimeoutError:
+                    idle = min(idle * 2, WORKER_POLL_INTERVAL)
+                continue
+            idle = 0.05
+            in_flight[doc["_id"]] = doc
+            task = asyncio.create_task(_process(dp, bot, queue, doc, semaphore))
+            tasks[doc["_id"]] = task
+            task.add_done_callback(lambda _, update_id=doc["_id"]: done(update_id))
+    finally:
+        if tasks:
+            _, pending = await asyncio.wait(list(tasks.values()), timeout=DRAIN_TIMEOUT)
+            for task in pending:
+                task.cancel()
\ No newline at end of file
@@ -0,0 +1,41 @@
+import logging
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config import WEBHOOK_PATH, WEBHOOK_SECRET
+from app.db.database import client
+from app.utils.metrics import render_metrics
+
+logger = logging.getLogger(__name__)
+
+async def healthz(request: web.Request):
+    try:
+        await client.admin.command('ping')
+    except Exception as e:
+        return web.json_response({"status": "error", "mongo": str(e)}, status=503)
+    return web.json_response({"status": "ok"})
+
+async def metrics(request: web.Request):
+    return web.Response(text=render_metrics(), content_type="text/plain")
+
+def build_web_app(dp: Dispatcher, bot: Bot, webhook=True):
+    app = web.Application()
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/metrics", metrics)
+
+    if webhook:
+        SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            secret_token=WEBHOOK_SECRET or None
+        ).register(app, path=WEBHOOK_PATH)
+        setup_application(app, dp, bot=bot)
+    return app
+
+async def start_web_app(app: web.Application, host, port):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Web server listening on {host}:{port}")
+    return runner
\ No newline at end of file
@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+
+os.environ.setdefault("DB_NAME", "support_bench")
+os.environ.setdefault("THROTTLE_RATE", "1000")
+os.environ.setdefault("THROTTLE_BURST", "1000")
+os.environ.setdefault("METRICS_ENABLED", "0")
+
+from pymongo import monitoring
+
+_db_calls: ContextVar[list | None] = ContextVar("bench_db_calls", default=None)
+_errors: ContextVar[list | None] = ContextVar("bench_errors", default=None)
+
+class BenchCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        calls = _db_calls.get()
+        if calls is not None:
+            calls[0] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+monitoring.register(BenchCommandListener())
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import (
+    SendMessage, SendPhoto, SendDocument, SendVideo, EditMessageText, EditMessageCaption
+)
+from aiogram.types import Message, Update
+
+from config import DB_NAME
+from main import create_dispatcher
+from app.db.database import (
+    client, admins_collection, users_collection, tickets_collection, broadcasts_collection, role_cache, ensure_indexes
+)
+from app.utils.broadcast import stop_broadcasts
+
+MESSAGE_METHODS = (SendMessage, SendPhoto, SendDocument, SendVideo, EditMessageText, EditMessageCaption)
+
+class FakeSession(BaseSession):
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+        self.calls = defaultdict(int)
+        self._message_ids = itertools.count(1_000_000)
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls[method.__api_method__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if isinstance(method, MESSAGE_METHODS):
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message.model_validate({
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": getattr(method, "text", None) or "bench"
+            }, context={"bot": bot})
+        return True
+
+    async def close(self):
+        pass
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+class UpdateFactory:
+    def __init__(self, bot):
+        self.bot = bot
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def _user(self, user_id):
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+
+    def message(self, user_id, text):
+        return Update.model_validate({
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": self._user(user_id),
+                "text": text
+            }
+        }, context={"bot": self.bot})
+
+    def callback(self, user_id, data):
+        return Update.model_validate({
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._update_ids)),
+                "from": self._user(user_id),
+                "chat_instance": "bench",
+                "data": data,
+                "message": {
+                    "message_id": next(self._message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "text": "bench"
+                }
+            }
+        }, context={"bot": self.bot})
+
+TICKET_FLOW = [
+    "/start",
+    "📝 Створити заявку",
+    "Бенчмарк Тест Тестович",
+    "0991234567",
+    "Не працює принтер у кабінеті 101",
+    "Пропустити",
+    "🔴 Високий",
+    "📜 Історія заявок",
+]
+
+async def count_errors(handler, event, data):
+    errors = _errors.get()
+    if errors is not None:
+        errors[0] += 1
+    return await handler(event, data)
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.db_calls = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def feed(self, dp, bot, scenario, update):
+        token = _db_calls.set([0])
+        errors_token = _errors.set([0])
+        started = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        finally:
+            self.latencies[scenario].append(time.perf_counter() - started)
+            self.db_calls[scenario].append(_db_calls.get()[0])
+            self.errors[scenario] += _errors.get()[0]
+            _db_calls.reset(token)
+            _errors.reset(errors_token)
+
+async def seed(staff_ids, user_ids):
+    await client.drop_database(DB_NAME)
+    await ensure_indexes()
+    await admins_collection.insert_many([
+        {"telegram_id": staff_id, "username": f"staff{staff_id}", "is_super_admin": i == 0}
+        for i, staff_id in enumerate(staff_ids)
+    ])
+    await users_collection.insert_many([
+        {"telegram_id": user_id, "username": f"user{user_id}", "registered_at": datetime.utcnow()}
+        for user_id in user_ids
+    ])
+    role_cache.invalidate()
+
+async def run(args):
+    if DB_NAME == "support_db":
+        raise SystemExit("Refusing to run against the production database, set DB_NAME to a scratch database")
+
+    session = FakeSession(args.api_latency / 1000)
+    bot = Bot("123456:BENCHMARK", session=session, default=DefaultBotProperties(parse_mode="HTML"))
+    dp = create_dispatcher()
+    dp.errors.outer_middleware(count_errors)
+    factory = UpdateFactory(bot)
+    recorder = Recorder()
+
+    staff_ids = list(range(1, args.staff + 1))
+    user_ids = list(range(10_000, 10_000 + args.users))
+    await seed(staff_ids, user_ids)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def user_flow(user_id):
+        async with semaphore:
+            for text in TICKET_FLOW:
+                await recorder.feed(dp, bot, "ticket_flow", factory.message(user_id, text))
+
+    async def staff_flow(staff_id, ticket_ids):
+        async with semaphore:
+            await recorder.feed(dp, bot, "active_tickets", factory.message(staff_id, "📢 Активні заявки"))
+            for ticket_id in ticket_ids:
+                await recorder.feed(dp, bot, "accept", factory.callback(staff_id, f"accept|{ticket_id}"))
+                await recorder.feed(dp, bot, "complete", factory.callback(staff_id, f"complete|{ticket_id}"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user_flow(user_id) for user_id in user_ids))
+
+    ticket_ids = [t["ticket_id"] async for t in tickets_collection.find({"status": "Очікує"}, {"ticket_id": 1})]
+    chunks = [ticket_ids[i::len(staff_ids)] for i in range(len(staff_ids))]
+    await asyncio.gather(*(staff_flow(staff_id, chunk) for staff_id, chunk in zip(staff_ids, chunks)))
+
+    if not args.skip_broadcast:
+        admin_id = staff_ids[0]
+        for text in ["📨 Створити розсилку", "Бенчмарк розсилки", "Пропустити"]:
+            await recorder.feed(dp, bot, "broadcast", factory.message(admin_id, text))
+        await recorder.feed(dp, bot, "broadcast", factory.callback(admin_id, "broadcast_send"))
+    elapsed = time.perf_counter() - started
+
+    await stop_broadcasts()
+    report(recorder, session, elapsed)
+    failures = [f"{scenario}: {count} handler errors" for scenario, count in recorder.errors.items() if count]
+    if not args.skip_broadcast and not await broadcasts_collection.count_documents({"admin_id": staff_ids[0]}):
+        failures.append("broadcast confirm did not create a broadcasts job")
+    if not args.keep:
+        await client.drop_database(DB_NAME)
+    await bot.session.close()
+    if failures:
+        raise SystemExit("❌ " + "; ".join(failures))
+
+def _percentiles(values):
+    if len(values) < 2:
+        value = values[0] if values else 0
+        return value, value, value
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return q[49], q[94], q[98]
+
+def report(recorder, session, elapsed):
+    total = sum(len(v) for v in recorder.latencies.values())
+    print(f"\n{total} updates in {elapsed:.2f}s -> {total / elapsed:.1f} updates/s")
+    print(f"Telegram API calls: {sum(session.calls.values())} {dict(session.calls)}\n")
+    print(f"{'scenario':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'db/upd':>9}{'errors':>8}")
+
+    all_latencies, all_calls = [], []
+    for scenario, latencies in recorder.latencies.items():
+        all_latencies += latencies
+        all_calls += recorder.db_calls[scenario]
+        p50, p95, p99 = _percentiles(latencies)
+        db_avg = statistics.mean(recorder.db_calls[scenario])
+        print(f"{scenario:<16}{len(latencies):>8}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}{db_avg:>9.2f}{recorder.errors[scenario]:>8}")
+
+    p50, p95, p99 = _percentiles(all_latencies)
+    print(f"{'total':<16}{total:>8}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}{statistics.mean(all_calls):>9.2f}{sum(recorder.errors.values()):>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic updates through the real Dispatcher")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--staff", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--api-latency", type=float, default=30, help="Simulated Telegram API latency, ms")
+    parser.add_argument("--skip-broadcast", action="store_true")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {DB_NAME} database after the run")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
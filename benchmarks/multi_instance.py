@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault("DB_NAME", "support_bench_multi")
+os.environ.setdefault("FSM_STORAGE", "mongo")
+os.environ.setdefault("THROTTLE_BACKEND", "mongo")
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+
+from benchmarks.load_test import FakeSession, UpdateFactory, TICKET_FLOW, seed
+from config import DB_NAME
+from main import create_dispatcher, create_ingress_dispatcher, shutdown_event
+from app.db.database import client, db, tickets_collection, updates_collection
+from app.utils.scheduler import Scheduler, INSTANCE_ID
+from app.utils.update_queue import UpdateQueue, consume_shard
+
+JOB_INTERVAL = 2
+processed_collection = db["bench_processed"]
+job_runs_collection = db["bench_job_runs"]
+
+async def record_processed(handler, event, data):
+    chat = data.get("event_chat")
+    await processed_collection.insert_one({
+        "update_id": event.update_id,
+        "chat_id": chat.id if chat else None,
+        "instance": INSTANCE_ID,
+        "at": datetime.utcnow()
+    })
+    return await handler(event, data)
+
+async def record_job_run():
+    await job_runs_collection.insert_one({"instance": INSTANCE_ID, "at": datetime.utcnow()})
+
+async def worker(args):
+    queue = UpdateQueue(shard_count=args.shards)
+    bot = Bot("123456:BENCHMARK", session=FakeSession(args.api_latency / 1000), default=DefaultBotProperties(parse_mode="HTML"))
+    dp = create_dispatcher()
+    dp.update.outer_middleware(record_processed)
+
+    scheduler = Scheduler()
+    scheduler.add_job(f"shard:{args.worker}", lambda: consume_shard(dp, bot, args.worker, queue, lease=10), interval=1, lease=10)
+    scheduler.add_job("bench_singleton", record_job_run, interval=JOB_INTERVAL, lease=10)
+    scheduler.start()
+    try:
+        await shutdown_event().wait()
+    finally:
+        await scheduler.stop()
+        await bot.session.close()
+
+def spawn_workers(args):
+    env = {**os.environ, "DB_NAME": DB_NAME, "SHARD_COUNT": str(args.shards), "METRICS_ENABLED": "0"}
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.multi_instance", "--worker", str(shard),
+             "--shards", str(args.shards), "--api-latency", str(args.api_latency)],
+            env={**env, "SHARD_INDEX": str(shard)}
+        )
+        for shard in range(args.shards) for _ in range(args.replicas)
+    ]
+
+async def wait_drained(timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not await updates_collection.count_documents({"status": {"$ne": "done"}}):
+            return True
+        await asyncio.sleep(0.5)
+    return False
+
+async def run(args):
+    if DB_NAME == "support_db":
+        raise SystemExit("Refusing to run against the production database, set DB_NAME to a scratch database")
+
+    staff_ids = list(range(1, args.staff + 1))
+    user_ids = list(range(10_000, 10_000 + args.users))
+    await seed(staff_ids, user_ids)
+
+    bot = Bot("123456:BENCHMARK", session=FakeSession(0), default=DefaultBotProperties(parse_mode="HTML"))
+    queue = UpdateQueue(shard_count=args.shards)
+    ingress = create_ingress_dispatcher(queue)
+    factory = UpdateFactory(bot)
+
+    workers = spawn_workers(args)
+    started = time.perf_counter()
+    pushed, redelivered = [], 0
+    try:
+        for text in TICKET_FLOW:
+            updates = [factory.message(user_id, text) for user_id in user_ids]
+            await asyncio.gather(*(ingress.feed_update(bot, update) for update in updates))
+            pushed += [update.update_id for update in updates]
+            for update in updates[::10]:
+                redelivered += not await queue.push(update, update.message.chat.id)
+            if not await wait_drained(args.timeout):
+                print(f"Timed out waiting for workers on step '{text}'")
+                break
+        await asyncio.sleep(max(0, JOB_INTERVAL * 3 - (time.perf_counter() - started)))
+    finally:
+        for proc in workers:
+            proc.send_signal(signal.SIGINT)
+        for proc in workers:
+            proc.wait(timeout=30)
+    elapsed = time.perf_counter() - started
+
+    ok = await report(args, pushed, redelivered, len(user_ids), elapsed)
+    if not args.keep:
+        await client.drop_database(DB_NAME)
+    await bot.session.close()
+    if not ok:
+        raise SystemExit(1)
+
+async def report(args, pushed, redelivered, users, elapsed):
+    duplicates = await processed_collection.aggregate([
+        {"$group": {"_id": "$update_id", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ]).to_list(length=None)
+    processed = set(await processed_collection.distinct("update_id"))
+    missing = set(pushed) - processed
+    split_chats = await processed_collection.aggregate([
+        {"$group": {"_id": "$chat_id", "instances": {"$addToSet": "$instance"}}},
+        {"$match": {"instances.1": {"$exists": True}}}
+    ]).to_list(length=None)
+    tickets = await tickets_collection.count_documents({})
+
+    runs = [run["at"] async for run in job_runs_collection.find().sort("at", 1)]
+    overlapping = sum((b - a).total_seconds() < JOB_INTERVAL / 2 for a, b in zip(runs, runs[1:]))
+
+    print(f"\n{len(pushed)} updates across {args.shards} shards x {args.replicas} replicas in {elapsed:.2f}s")
+    print(f"redelivered updates dropped by the queue: {redelivered}/{len(pushed[::10])}")
+    print(f"processed more than once: {len(duplicates)}")
+    print(f"never processed: {len(missing)}")
+    print(f"chats handled by more than one worker: {len(split_chats)}")
+    print(f"tickets created: {tickets} (expected {users})")
+    print(f"singleton job runs: {len(runs)}, overlapping: {overlapping}")
+
+    ok = not duplicates and not missing and not split_chats and not overlapping and tickets == users
+    print("\n✅ No duplicate processing" if ok else "\n❌ Consistency check failed")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several sharded workers against one Mongo and check for duplicate processing")
+    parser.add_argument("--shards", type=int, default=3)
+    parser.add_argument("--replicas", type=int, default=2, help="Processes competing for each shard lease")
+    parser.add_argument("--users", type=int, default=60)
+    parser.add_argument("--staff", type=int, default=3)
+    parser.add_argument("--api-latency", type=float, default=10, help="Simulated Telegram API latency, ms")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for each flow step to drain")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {DB_NAME} database after the run")
+    args = parser.parse_args()
+    asyncio.run(worker(args) if args.worker is not None else run(args))
+
+if __name__ == "__main__":
+    main()
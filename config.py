@@ -5,7 +5,91 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = "support_db"
+DB_NAME = os.getenv("DB_NAME", "support_db")
+ROLE_CACHE_TTL = int(os.getenv("ROLE_CACHE_TTL", "300"))
+ROLE_CACHE_CHECK = float(os.getenv("ROLE_CACHE_CHECK", "2"))
+
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "10"))
+BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "200"))
+BROADCAST_STALE_AFTER = int(os.getenv("BROADCAST_STALE_AFTER", "120"))
+
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "10"))
+NOTIFY_RETRIES = int(os.getenv("NOTIFY_RETRIES", "3"))
+
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "25"))
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))
+SEND_CHAT_BURST = float(os.getenv("SEND_CHAT_BURST", "3"))
+SEND_WORKERS = int(os.getenv("SEND_WORKERS", "8"))
+SEND_RETRIES = int(os.getenv("SEND_RETRIES", "3"))
+
+ERROR_ALERT_INTERVAL = int(os.getenv("ERROR_ALERT_INTERVAL", "300"))
+ERROR_WINDOW = int(os.getenv("ERROR_WINDOW", "3600"))
+ERROR_BUFFER_SIZE = int(os.getenv("ERROR_BUFFER_SIZE", "100"))
+
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "14"))
+LOG_CONSOLE_FORMAT = os.getenv("LOG_CONSOLE_FORMAT", "text")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+LOG_SAMPLED_LOGGERS = [x.strip() for x in os.getenv("LOG_SAMPLED_LOGGERS", "app.handlers,app.updates").split(",") if x.strip()]
+
+DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "10"))
+DASHBOARD_SNIPPET = int(os.getenv("DASHBOARD_SNIPPET", "80"))
+NAME_SNIPPET = int(os.getenv("NAME_SNIPPET", "40"))
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "5"))
+HISTORY_SNIPPET = int(os.getenv("HISTORY_SNIPPET", "200"))
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+STATS_DAYS = int(os.getenv("STATS_DAYS", "7"))
+STATS_REFRESH_INTERVAL = int(os.getenv("STATS_REFRESH_INTERVAL", "900"))
+KEYBOARD_CACHE_SIZE = int(os.getenv("KEYBOARD_CACHE_SIZE", "1024"))
+MEDIA_CACHE_SIZE = int(os.getenv("MEDIA_CACHE_SIZE", "512"))
+MEDIA_GROUP_DEBOUNCE = float(os.getenv("MEDIA_GROUP_DEBOUNCE", "0.8"))
+MAX_ATTACHMENTS = int(os.getenv("MAX_ATTACHMENTS", "10"))
+
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "memory")
+THROTTLE_RATE = float(os.getenv("THROTTLE_RATE", "1"))
+THROTTLE_BURST = float(os.getenv("THROTTLE_BURST", "5"))
+SERVER_CALL_COOLDOWN = int(os.getenv("SERVER_CALL_COOLDOWN", "300"))
+
+FSM_STORAGE = os.getenv("FSM_STORAGE", "mongo")
+FSM_TTL = int(os.getenv("FSM_TTL", str(60 * 60 * 24)))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+BOT_ROLE = os.getenv("BOT_ROLE", "standalone")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_LEASE = int(os.getenv("SHARD_LEASE", "30"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "20"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1"))
+UPDATE_RETENTION = int(os.getenv("UPDATE_RETENTION", str(60 * 60 * 24)))
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_BATCH_SIZE = int(os.getenv("BACKUP_BATCH_SIZE", "1000"))
+BACKUP_PART_LIMIT = int(os.getenv("BACKUP_PART_LIMIT", str(45 * 1024 * 1024)))
+BACKUP_CRON = os.getenv("BACKUP_CRON", "0 3 * * *")
+HEALTH_CHECK_INTERVAL = int(os.getenv("HEALTH_CHECK_INTERVAL", "60"))
+BACKUP_FULL_EVERY_DAYS = int(os.getenv("BACKUP_FULL_EVERY_DAYS", "7"))
+BACKUP_KEEP_FULL = int(os.getenv("BACKUP_KEEP_FULL", "2"))
+BACKUP_TOMBSTONE_DAYS = int(os.getenv("BACKUP_TOMBSTONE_DAYS", str(BACKUP_FULL_EVERY_DAYS * 2)))
+
+def _minutes_list(value):
+    return [int(x) for x in value.split(",") if x.strip().isdigit()]
+
+SLA_THRESHOLDS = {
+    "Високий": _minutes_list(os.getenv("SLA_HIGH", "15,30,60")),
+    "Середній": _minutes_list(os.getenv("SLA_MEDIUM", "120,240")),
+    "Низький": _minutes_list(os.getenv("SLA_LOW", "")),
+}
+SLA_CHECK_INTERVAL = int(os.getenv("SLA_CHECK_INTERVAL", "60"))
+LIVE_CARDS_POLL_INTERVAL = int(os.getenv("LIVE_CARDS_POLL_INTERVAL", "5"))
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", "8080"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
 
 support_ids_str = os.getenv("SUPPORT_IDS", "")
 SUPPORT_IDS = [int(x) for x in support_ids_str.split(",") if x.strip().isdigit()]
\ No newline at end of file
@@ -1,52 +1,165 @@
 import asyncio
 import logging
-import sys
-import os
-from datetime import datetime
+import signal
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 
-from config import BOT_TOKEN
+from config import (
+    BOT_TOKEN, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEB_HOST, WEB_PORT, METRICS_ENABLED,
+    BACKUP_CRON, HEALTH_CHECK_INTERVAL, THROTTLE_BACKEND, SLA_CHECK_INTERVAL,
+    STATS_REFRESH_INTERVAL, BROADCAST_STALE_AFTER, BOT_ROLE, SHARD_COUNT, SHARD_INDEX, SHARD_LEASE
+)
+from app.db.database import init_db, close_db, throttle_collection
 from app.filters.role_filters import IsSupport, IsNotSupport
+from app.middlewares.role_middleware import RoleMiddleware
+from app.middlewares.fsm_middleware import FSMBatchMiddleware
+from app.middlewares.throttling import ThrottlingMiddleware
+from app.middlewares.metrics_middleware import UpdateMetricsMiddleware, HandlerMetricsMiddleware, TelegramMetricsMiddleware
+from app.middlewares.outbound import OutboundQueueMiddleware
+from app.middlewares.logging_middleware import LogContextMiddleware
+from app.middlewares.sharding import ShardingMiddleware
+from app.fsm.storage import create_fsm_storage, CoalescingStorage
 from app.handlers import user_handlers, support_handlers
-from app.handlers.error_handler import error_router
+from app.handlers.error_handler import error_router, flush_error_alerts
 from app.utils.health_check import db_health_check
 from app.utils.backup import create_db_backup
+from app.utils.broadcast import resume_broadcasts, stop_broadcasts
+from app.utils.webserver import build_web_app, start_web_app
+from app.utils.scheduler import Scheduler
+from app.utils.escalation import check_sla
+from app.db.stats import rebuild_stats
+from app.utils.live_cards import watch_tickets
+from app.utils.send_queue import send_queue
+from app.utils.logging_setup import setup_logging
+from app.utils.throttle_store import MemoryBucketStore, MongoBucketStore
+from app.utils.update_queue import consume_shard, update_queue
 
 async def main():
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
+    log_listener = setup_logging()
+    await init_db()
 
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    log_file = os.path.join('logs', f'{current_date}.log')
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
+    bot.session.middleware(OutboundQueueMiddleware())
+    bot.session.middleware(TelegramMetricsMiddleware())
 
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
+    scheduler = None
+    if BOT_ROLE == "ingress":
+        allowed_updates = create_dispatcher().resolve_used_update_types()
+        dp = create_ingress_dispatcher()
+        logging.info(f"Ingress started, sharding updates across {SHARD_COUNT} workers")
+    else:
+        dp = create_dispatcher()
+        allowed_updates = dp.resolve_used_update_types()
+        scheduler = create_scheduler(dp, bot)
+        scheduler.start()
+        await resume_broadcasts(bot)
+        logging.info(f"Bot started as {BOT_ROLE}" + (f" for shard {SHARD_INDEX}/{SHARD_COUNT}" if BOT_ROLE == "worker" else ""))
 
-    logging.basicConfig(level=logging.INFO, handlers=[file_handler, console_handler])
+    try:
+        if BOT_ROLE == "worker":
+            await run_worker(dp, bot)
+        elif WEBHOOK_URL:
+            await run_webhook(dp, bot, allowed_updates)
+        else:
+            runner = None
+            if METRICS_ENABLED:
+                runner = await start_web_app(build_web_app(dp, bot, webhook=False), WEB_HOST, WEB_PORT)
+            await bot.delete_webhook(drop_pending_updates=True)
+            try:
+                await dp.start_polling(bot, allowed_updates=allowed_updates)
+            finally:
+                if runner:
+                    await runner.cleanup()
+    finally:
+        if scheduler:
+            await scheduler.stop()
+        await stop_broadcasts()
+        await send_queue.close()
+        await close_db()
+        log_listener.stop()
 
-    bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
+def create_scheduler(dp: Dispatcher, bot: Bot):
+    scheduler = Scheduler()
+    if SHARD_INDEX == 0:
+        scheduler.add_job("db_health_check", lambda: db_health_check(bot), interval=HEALTH_CHECK_INTERVAL, distributed=False)
+    scheduler.add_job("error_alerts", lambda: flush_error_alerts(bot), interval=60, distributed=False)
+    scheduler.add_job("db_backup", lambda: create_db_backup(bot), cron=BACKUP_CRON, jitter=60, lease=1800)
+    scheduler.add_job("sla_escalation", lambda: check_sla(bot), interval=SLA_CHECK_INTERVAL, lease=120)
+    scheduler.add_job("stats_rebuild", rebuild_stats, interval=STATS_REFRESH_INTERVAL, lease=600)
+    scheduler.add_job("live_cards", lambda: watch_tickets(bot), interval=30, lease=60)
+    scheduler.add_job("broadcast_resume", lambda: resume_broadcasts(bot), interval=BROADCAST_STALE_AFTER, lease=60)
+    if BOT_ROLE == "worker":
+        scheduler.add_job(f"shard:{SHARD_INDEX}", lambda: consume_shard(dp, bot, SHARD_INDEX), interval=5, lease=SHARD_LEASE)
+    return scheduler
+
+def create_ingress_dispatcher(queue=update_queue):
     dp = Dispatcher()
+    dp.update.outer_middleware(ShardingMiddleware(queue))
+    return dp
+
+def create_dispatcher():
+    storage = create_fsm_storage()
+    dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(LogContextMiddleware())
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    throttle_store = MongoBucketStore(throttle_collection) if THROTTLE_BACKEND == "mongo" else MemoryBucketStore()
+    dp.update.outer_middleware(ThrottlingMiddleware(throttle_store))
+    if isinstance(storage, CoalescingStorage):
+        dp.update.outer_middleware(FSMBatchMiddleware(storage))
+    dp.update.outer_middleware(RoleMiddleware())
 
     user_handlers.router.message.filter(IsNotSupport())
     user_handlers.router.callback_query.filter(IsNotSupport())
     support_handlers.router.message.filter(IsSupport())
     support_handlers.router.callback_query.filter(IsSupport())
+    support_handlers.router.inline_query.filter(IsSupport())
 
     dp.include_router(support_handlers.router)
     dp.include_router(user_handlers.router)
     dp.include_router(error_router)
-    
-    logging.info("Bot started...")
-    
-    asyncio.create_task(db_health_check(bot))
-    asyncio.create_task(create_db_backup(bot))
-
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+
+    for event_type, observer in dp.observers.items():
+        if event_type not in ("update", "error"):
+            observer.middleware(HandlerMetricsMiddleware())
+    return dp
+
+def shutdown_event():
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+    return stop_event
+
+async def run_worker(dp: Dispatcher, bot: Bot):
+    stop_event = shutdown_event()
+    runner = None
+    if METRICS_ENABLED:
+        runner = await start_web_app(build_web_app(dp, bot, webhook=False), WEB_HOST, WEB_PORT)
+    try:
+        await stop_event.wait()
+    finally:
+        logging.info("Shutting down worker...")
+        if runner:
+            await runner.cleanup()
+
+async def run_webhook(dp: Dispatcher, bot: Bot, allowed_updates):
+    stop_event = shutdown_event()
+
+    await bot.set_webhook(
+        WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET or None,
+        allowed_updates=allowed_updates
+    )
+    runner = await start_web_app(build_web_app(dp, bot), WEB_HOST, WEB_PORT)
+    logging.info(f"Webhook mode: receiving updates on {WEBHOOK_PATH}")
+    try:
+        await stop_event.wait()
+    finally:
+        logging.info("Shutting down webhook server...")
+        await runner.cleanup()
 
 if __name__ == "__main__":
     try: